@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Build a compact JSON catalog of the gallery sources without decoding any media.
+
+Only cheap metadata is read:
+- MCAP: the summary section (statistics, channels, schemas)
+- LeRobot v2.1: meta/info.json, meta/episodes.jsonl and parquet footers
+- Lumos: RGB_Images/timestamps.csv lengths and first/last stamps
+
+The gallery fetches the catalog at startup to show duration, frame count,
+cameras and size for each dataset.
+
+Usage:
+    python build_catalog.py
+    python build_catalog.py --mcap-dir public/mcap --lumos-dir "../WBCD DataDemo"
+    python build_catalog.py --lerobot source-data/tacexo_fold_towels --output public/catalog.json
+"""
+import os
+import json
+import argparse
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+
+def file_size(path: Path) -> int:
+    """Size of a file in bytes, 0 if it does not exist."""
+    try:
+        return path.stat().st_size
+    except OSError:
+        return 0
+
+
+def scan_mcap(mcap_path: Path) -> dict:
+    """Read the MCAP summary section only (no message decoding)."""
+    from mcap.reader import make_reader
+
+    with open(mcap_path, "rb") as f:
+        summary = make_reader(f).get_summary()
+
+    entry = {
+        "id": mcap_path.stem,
+        "kind": "mcap",
+        "path": str(mcap_path),
+        "size": file_size(mcap_path),
+    }
+    if summary is None or summary.statistics is None:
+        # Unindexed file: we refuse to fall back to a full scan here
+        entry["indexed"] = False
+        return entry
+
+    stats = summary.statistics
+    streams = {}
+    cameras = []
+    frames = 0
+    for channel_id, channel in summary.channels.items():
+        count = stats.channel_message_counts.get(channel_id, 0)
+        streams[channel.topic] = count
+        schema = summary.schemas.get(channel.schema_id)
+        if schema is not None and "CompressedImage" in schema.name:
+            cameras.append(channel.topic)
+            frames = max(frames, count)
+
+    entry.update({
+        "start": stats.message_start_time / 1e9,
+        "end": stats.message_end_time / 1e9,
+        "duration": (stats.message_end_time - stats.message_start_time) / 1e9,
+        "messages": stats.message_count,
+        "frames": frames,
+        "cameras": sorted(cameras),
+        "streams": streams,
+    })
+    return entry
+
+
+def scan_lerobot(dataset_path: Path) -> list:
+    """Catalog every episode of a LeRobot v2.1 dataset from its metadata."""
+    import pyarrow.parquet as pq
+
+    with open(dataset_path / "meta" / "info.json", "r") as f:
+        info = json.load(f)
+    episodes = []
+    with open(dataset_path / "meta" / "episodes.jsonl", "r") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                episodes.append(json.loads(line))
+
+    fps = info.get("fps", 30)
+    chunks_size = info.get("chunks_size", 1000)
+    data_path = info.get("data_path", "data/chunk-{episode_chunk:03d}/episode_{episode_index:06d}.parquet")
+    video_templates = [t for t in (info.get("video_path"), info.get("mov_path")) if t]
+    video_keys = [key for key, feature in info.get("features", {}).items()
+                  if feature.get("dtype") in ("video", "tactile")]
+
+    entries = []
+    for episode in episodes:
+        episode_idx = episode["episode_index"]
+        chunk_idx = episode_idx // chunks_size
+        parquet_path = dataset_path / data_path.format(episode_chunk=chunk_idx, episode_index=episode_idx)
+
+        size = file_size(parquet_path)
+        rows = None
+        error = None
+        if parquet_path.exists():
+            # Footer only: row count without touching column data
+            try:
+                rows = pq.read_metadata(parquet_path).num_rows
+            except (OSError, ValueError) as e:
+                # Truncated file or Git LFS pointer: keep the episode, without a row count
+                error = f"unreadable parquet: {e}"
+                print(f"  Warning: {parquet_path}: {e}")
+
+        cameras = []
+        for key in video_keys:
+            for template in video_templates:
+                video_file = dataset_path / template.format(
+                    episode_chunk=chunk_idx, video_key=key, episode_index=episode_idx)
+                video_size = file_size(video_file)
+                if video_size:
+                    size += video_size
+                    cameras.append(key)
+                    break
+
+        length = episode.get("length", rows or 0)
+        entries.append({
+            "id": f"{dataset_path.name}_episode_{episode_idx}",
+            "kind": "lerobot",
+            "path": str(dataset_path),
+            "episode": episode_idx,
+            "tasks": episode.get("tasks", []),
+            "fps": fps,
+            "frames": length,
+            "rows": rows,
+            "duration": length / fps if fps else None,
+            "cameras": cameras,
+            "size": size,
+        })
+        if error is not None:
+            entries[-1]["error"] = error
+    return entries
+
+
+def read_csv_span(csv_path: Path, column: str = "header_stamp") -> tuple:
+    """Return (row_count, first_value, last_value) of a CSV column.
+
+    Rows are counted by scanning for newlines in binary blocks and the last
+    row is read by seeking from the end, so no parsing of the body happens.
+    """
+    with open(csv_path, "rb") as f:
+        header = f.readline().decode().strip().split(",")
+        first_line = f.readline()
+        rows = first_line.count(b"\n")
+        last_byte = first_line[-1:]
+        while True:
+            block = f.read(1 << 20)
+            if not block:
+                break
+            rows += block.count(b"\n")
+            last_byte = block[-1:]
+        if last_byte and last_byte != b"\n":
+            rows += 1
+        f.seek(max(0, f.tell() - 4096))
+        tail = [line for line in f.read().splitlines() if line.strip()]
+
+    if column not in header or not rows:
+        return rows, None, None
+    col = header.index(column)
+    first = float(first_line.decode().split(",")[col])
+    last = float(tail[-1].decode().split(",")[col])
+    return rows, first, last
+
+
+def scan_lumos_session(session_path: Path, entry_id: str) -> dict:
+    """Catalog a Lumos session from the per-hand timestamps.csv files."""
+    cameras = []
+    frames = 0
+    start = end = None
+    size = 0
+    for hand_dir in sorted(session_path.glob("*_hand_*")):
+        video_dir = hand_dir / "RGB_Images"
+        size += file_size(video_dir / "video.mp4")
+        timestamps_file = video_dir / "timestamps.csv"
+        if not timestamps_file.exists():
+            continue
+        hand_name = "left_hand" if "left_hand" in hand_dir.name else "right_hand"
+        cameras.append(f"world/{hand_name}/camera")
+        rows, first, last = read_csv_span(timestamps_file)
+        frames = max(frames, rows)
+        if first is not None:
+            start = first if start is None else min(start, first)
+            end = last if end is None else max(end, last)
+
+    return {
+        "id": entry_id,
+        "kind": "lumos",
+        "path": str(session_path),
+        "start": start,
+        "end": end,
+        "duration": (end - start) if start is not None else None,
+        "frames": frames,
+        "cameras": cameras,
+        "size": size,
+    }
+
+
+def find_lumos_sessions(lumos_dir: Path) -> list:
+    """List (session_path, id) pairs for a `<task>/<session>` directory tree."""
+    sessions = []
+    for task_dir in sorted(p for p in lumos_dir.iterdir() if p.is_dir()):
+        task_sessions = sorted(p for p in task_dir.glob("session_*") if p.is_dir())
+        for session in task_sessions:
+            # Single-session tasks keep the short name used by the gallery
+            if len(task_sessions) == 1:
+                entry_id = f"lumos_{task_dir.name}"
+            else:
+                entry_id = f"lumos_{task_dir.name}_{session.name}"
+            sessions.append((session, entry_id))
+    return sessions
+
+
+def find_lerobot_datasets(root: Path) -> list:
+    """Find LeRobot datasets (directories with meta/info.json) under root."""
+    if not root.exists():
+        return []
+    return sorted(p.parent.parent for p in root.glob("**/meta/info.json"))
+
+
+def build_catalog(mcap_dir: Path = None, lerobot_paths: list = (), lumos_dir: Path = None,
+                  workers: int = 16) -> dict:
+    """Scan all sources in parallel and return the catalog dict."""
+    jobs = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        if mcap_dir is not None and mcap_dir.exists():
+            for mcap_file in sorted(mcap_dir.glob("*.mcap")):
+                jobs.append((mcap_file, pool.submit(scan_mcap, mcap_file)))
+        for dataset_path in lerobot_paths:
+            jobs.append((dataset_path, pool.submit(scan_lerobot, dataset_path)))
+        if lumos_dir is not None and lumos_dir.exists():
+            for session, entry_id in find_lumos_sessions(lumos_dir):
+                jobs.append((session, pool.submit(scan_lumos_session, session, entry_id)))
+
+        entries = []
+        for source, future in jobs:
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"  ERROR scanning {source}: {e}")
+                continue
+            entries.extend(result if isinstance(result, list) else [result])
+
+    return {"version": 1, "datasets": {entry["id"]: entry for entry in entries}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the gallery catalog from source metadata")
+    parser.add_argument("--mcap-dir", type=Path, default=Path("public/mcap"), help="Directory of MCAP files")
+    parser.add_argument("--lerobot", type=Path, nargs="*", default=None,
+                        help="LeRobot dataset directories (default: all under source-data)")
+    parser.add_argument("--lumos-dir", type=Path, default=None, help="Lumos root with <task>/<session> folders")
+    parser.add_argument("--output", type=Path, default=Path("public/catalog.json"), help="Output catalog path")
+    parser.add_argument("--workers", type=int, default=16, help="Parallel metadata readers (default: 16)")
+    args = parser.parse_args()
+
+    lerobot_paths = args.lerobot if args.lerobot is not None else find_lerobot_datasets(Path("source-data"))
+
+    catalog = build_catalog(args.mcap_dir, lerobot_paths, args.lumos_dir, args.workers)
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(catalog, f, separators=(",", ":"))
+
+    print(f"Cataloged {len(catalog['datasets'])} entries")
+    print(f"Output: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
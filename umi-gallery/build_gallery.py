@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Build all gallery RRD files and thumbnails from a declarative dataset list.
+
+Reads gallery_build.json, plans convert -> optimize and thumbnail jobs as a
+dependency graph, and runs them in parallel within a CPU and memory budget.
+Each job's output is streamed with a `[job name]` prefix.
+
+Config format:
+    {
+      "rrd_dir": "public/rrd",
+      "thumbnail_dir": "public/thumbnails",
+      "datasets": [
+        {"kind": "mcap", "source": "public/mcap"},
+        {"kind": "lerobot", "source": "source-data/lerobot-data/dm_insert", "episodes": [0]},
+        {"kind": "tacexo", "source": "source-data/tacexo_fold_towels", "episodes": "all"},
+        {"kind": "lumos", "source": "../WBCD DataDemo/task1/session_001", "name": "lumos_task1"}
+      ]
+    }
+
+Usage:
+    python build_gallery.py
+    python build_gallery.py --config gallery_build.json --jobs 8 --memory-budget 16GiB
+    python build_gallery.py --dry-run
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from optimize_rrd import parse_size
+
+# Rough peak memory per job kind (MiB), used to stay inside --memory-budget
+JOB_MEMORY_MB = {
+    "convert": 1024,
+    "optimize": 512,
+    "thumbnail": 256,
+}
+
+
+# ---------------------------------------------------------------------------
+# Job functions (run inside worker processes)
+# ---------------------------------------------------------------------------
+
+def convert_mcap(source: str, output: str):
+    from convert_mcap_to_rrd import convert_mcap_to_rrd
+    convert_mcap_to_rrd(source, output)
+
+
+def convert_lerobot(preset: str, source: str, episode: int, output_dir: str):
+    import importlib
+    import lerobot_streams
+
+    # The converter scripts hold the per-dataset defaults (streams, entity names)
+    script = importlib.import_module(f"convert_{preset}_to_rrd")
+    dataset_path = Path(source)
+    info = lerobot_streams.load_dataset_info(dataset_path)
+    streams = lerobot_streams.select_streams(lerobot_streams.list_streams(info), script.DEFAULT_INCLUDE)
+    select_joints = getattr(script, "select_finger_joints", lerobot_streams.all_joints)
+    lerobot_streams.convert_episode(dataset_path, episode, Path(output_dir), info, streams,
+                                    script.ENTITY_NAMES, select_joints)
+
+
+def convert_lumos(source: str, output: str):
+    from convert_lumos_to_rrd import convert_lumos_to_rrd
+    convert_lumos_to_rrd(Path(source), Path(output))
+
+
+def optimize(output: str):
+    from optimize_rrd import optimize_rrd
+    optimize_rrd(output)
+
+
+def thumbnail_mcap(source: str, thumbnail_dir: str):
+    from extract_thumbnails import extract_thumbnail
+    extract_thumbnail(source, thumbnail_dir)
+
+
+def thumbnail_lerobot(preset: str, source: str, episode: int, output: str):
+    import importlib
+    import lerobot_streams
+
+    script = importlib.import_module(f"convert_{preset}_to_rrd")
+    dataset_path = Path(source)
+    info = lerobot_streams.load_dataset_info(dataset_path)
+    video_path = lerobot_streams.video_file(dataset_path, info, script.THUMBNAIL_STREAM, episode)
+    lerobot_streams.extract_thumbnail(video_path, Path(output))
+
+
+def thumbnail_lumos(source: str, output: str):
+    from extract_lumos_thumbnails import extract_thumbnail
+    videos = sorted(Path(source).glob("left_hand_*/RGB_Images/video.mp4")) or \
+        sorted(Path(source).glob("*_hand_*/RGB_Images/video.mp4"))
+    if not videos:
+        print(f"Warning: No hand video found in {source}")
+        return
+    extract_thumbnail(videos[0], output)
+
+
+class PrefixedWriter:
+    """File-like wrapper that prefixes every output line with the job name."""
+
+    def __init__(self, stream, prefix: str):
+        self.stream = stream
+        self.prefix = prefix
+        self.pending = ""
+
+    def write(self, text):
+        self.pending += text
+        *lines, self.pending = self.pending.split("\n")
+        for line in lines:
+            self.stream.write(f"{self.prefix}{line}\n")
+        self.stream.flush()
+        return len(text)
+
+    def flush(self):
+        if self.pending:
+            self.stream.write(f"{self.prefix}{self.pending}\n")
+            self.pending = ""
+        self.stream.flush()
+
+
+def run_job(name: str, func, kwargs: dict) -> float:
+    """Run one job function with prefixed output; returns its wall time."""
+    stdout = sys.stdout
+    sys.stdout = PrefixedWriter(stdout, f"[{name}] ")
+    start = time.monotonic()
+    try:
+        func(**kwargs)
+    finally:
+        sys.stdout.flush()
+        sys.stdout = stdout
+    return time.monotonic() - start
+
+
+# ---------------------------------------------------------------------------
+# Planning
+# ---------------------------------------------------------------------------
+
+def make_job(name: str, kind: str, func, deps: list = (), **kwargs) -> dict:
+    return {"name": name, "kind": kind, "func": func, "kwargs": kwargs,
+            "deps": list(deps), "memory": JOB_MEMORY_MB[kind]}
+
+
+def lerobot_episode_indices(source: Path, episodes) -> list:
+    """Resolve the `episodes` field: a list of indices or "all"."""
+    if episodes == "all":
+        from lerobot_streams import load_episodes
+        return [episode["episode_index"] for episode in load_episodes(source)]
+    return list(episodes if episodes is not None else [0])
+
+
+def plan_dataset(dataset: dict, rrd_dir: Path, thumbnail_dir: Path) -> list:
+    """Expand one config entry into its convert/optimize/thumbnail jobs."""
+    kind = dataset["kind"]
+    source = Path(dataset["source"])
+    jobs = []
+
+    def convert_and_optimize(name: str, rrd_path: Path, func, **kwargs):
+        jobs.append(make_job(f"convert:{name}", "convert", func, **kwargs))
+        jobs.append(make_job(f"optimize:{name}", "optimize", optimize,
+                             deps=[f"convert:{name}"], output=str(rrd_path)))
+
+    if kind == "mcap":
+        mcap_files = sorted(source.glob("*.mcap")) if source.is_dir() else [source]
+        for mcap_file in mcap_files:
+            output = rrd_dir / f"{mcap_file.stem}.rrd"
+            convert_and_optimize(mcap_file.stem, output, convert_mcap,
+                                 source=str(mcap_file), output=str(output))
+            jobs.append(make_job(f"thumbnail:{mcap_file.stem}", "thumbnail", thumbnail_mcap,
+                                 source=str(mcap_file), thumbnail_dir=str(thumbnail_dir)))
+
+    elif kind in ("lerobot", "tacexo"):
+        for episode in lerobot_episode_indices(source, dataset.get("episodes")):
+            name = f"{source.name}_episode_{episode}"
+            convert_and_optimize(name, rrd_dir / f"{name}.rrd", convert_lerobot, preset=kind,
+                                 source=str(source), episode=episode, output_dir=str(rrd_dir))
+            jobs.append(make_job(f"thumbnail:{name}", "thumbnail", thumbnail_lerobot, preset=kind,
+                                 source=str(source), episode=episode,
+                                 output=str(thumbnail_dir / f"{name}.jpg")))
+
+    elif kind == "lumos":
+        name = dataset.get("name", source.name)
+        output = rrd_dir / f"{name}.rrd"
+        convert_and_optimize(name, output, convert_lumos, source=str(source), output=str(output))
+        jobs.append(make_job(f"thumbnail:{name}", "thumbnail", thumbnail_lumos,
+                             source=str(source), output=str(thumbnail_dir / f"{name}.jpg")))
+
+    else:
+        raise ValueError(f"Unknown dataset kind: {kind}")
+
+    return jobs
+
+
+def plan_build(config: dict) -> list:
+    """Plan all jobs for a build config, skipping sources that are missing."""
+    rrd_dir = Path(config.get("rrd_dir", "public/rrd"))
+    thumbnail_dir = Path(config.get("thumbnail_dir", "public/thumbnails"))
+    jobs = []
+    for dataset in config["datasets"]:
+        if not Path(dataset["source"]).exists():
+            print(f"Warning: Source not found, skipping: {dataset['source']}")
+            continue
+        for job in plan_dataset(dataset, rrd_dir, thumbnail_dir):
+            if any(job["name"] == other["name"] for other in jobs):
+                print(f"Warning: Duplicate job, skipping: {job['name']}")
+                continue
+            jobs.append(job)
+    return jobs
+
+
+def staging_dir(output_dir: Path, name: str) -> Path:
+    """Per-dataset scratch directory next to the published outputs.
+
+    It sits on the same filesystem as `output_dir`, so publishing is a rename.
+    """
+    return output_dir / ".staging" / name
+
+
+def publish(staging: Path, output_dir: Path) -> list:
+    """Atomically move every finished file from `staging` into `output_dir`."""
+    published = []
+    for path in sorted(staging.iterdir()) if staging.exists() else []:
+        if path.is_file() and not path.name.endswith(".optimizing"):
+            os.replace(path, output_dir / path.name)
+            published.append(path.name)
+    return published
+
+
+def build_dataset(dataset: dict, rrd_dir: str, thumbnail_dir: str, name: str):
+    """Convert, optimize and thumbnail one dataset, then publish the results.
+
+    Everything is written to staging directories first and renamed into place
+    at the end, so a server reading `rrd_dir` never sees a half-written file
+    and a failed build leaves the previous outputs untouched.
+    """
+    rrd_dir, thumbnail_dir = Path(rrd_dir), Path(thumbnail_dir)
+    rrd_staging = staging_dir(rrd_dir, name)
+    thumbnail_staging = staging_dir(thumbnail_dir, name)
+    try:
+        rrd_staging.mkdir(parents=True, exist_ok=True)
+        thumbnail_staging.mkdir(parents=True, exist_ok=True)
+        # Jobs are planned in dependency order, so running them in sequence is enough
+        for job in plan_dataset(dataset, rrd_staging, thumbnail_staging):
+            job["func"](**job["kwargs"])
+        published = publish(rrd_staging, rrd_dir) + publish(thumbnail_staging, thumbnail_dir)
+        print(f"Published {', '.join(published) or 'nothing'}")
+    finally:
+        for staging in (rrd_staging, thumbnail_staging):
+            shutil.rmtree(staging, ignore_errors=True)
+            try:
+                staging.parent.rmdir()  # only succeeds once no other build is staging
+            except OSError:
+                pass
+
+
+# ---------------------------------------------------------------------------
+# Scheduling
+# ---------------------------------------------------------------------------
+
+def total_memory_mb() -> int:
+    """Physical memory of the machine in MiB."""
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // (1024 * 1024)
+    except (ValueError, OSError):
+        return 8192
+
+
+def run_jobs(jobs: list, max_jobs: int, memory_budget_mb: int) -> list:
+    """Run the job DAG in a process pool; returns the names of failed jobs."""
+    pending = {job["name"]: job for job in jobs}
+    done, failed = set(), []
+    running = {}
+    memory_in_use = 0
+    total = len(jobs)
+
+    with ProcessPoolExecutor(max_workers=max_jobs) as pool:
+        while pending or running:
+            # Start every ready job that fits the budget. The first job always
+            # starts, even if it alone exceeds the memory budget.
+            for name, job in list(pending.items()):
+                if len(running) >= max_jobs:
+                    break
+                if any(dep in failed for dep in job["deps"]):
+                    print(f"[build] Skipping {name}: dependency failed")
+                    failed.append(name)
+                    del pending[name]
+                    continue
+                if not all(dep in done for dep in job["deps"]):
+                    continue
+                if running and memory_in_use + job["memory"] > memory_budget_mb:
+                    continue
+                future = pool.submit(run_job, name, job["func"], job["kwargs"])
+                running[future] = job
+                memory_in_use += job["memory"]
+                del pending[name]
+
+            if not running:
+                break
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                job = running.pop(future)
+                memory_in_use -= job["memory"]
+                try:
+                    elapsed = future.result()
+                    done.add(job["name"])
+                    print(f"[build] ({len(done) + len(failed)}/{total}) {job['name']} done in {elapsed:.1f}s")
+                except Exception as e:
+                    failed.append(job["name"])
+                    print(f"[build] ({len(done) + len(failed)}/{total}) {job['name']} FAILED: {e}")
+
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build gallery RRD files and thumbnails in parallel")
+    parser.add_argument("--config", type=Path, default=Path("gallery_build.json"), help="Build config (JSON)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Max parallel jobs (default: CPU count)")
+    parser.add_argument("--memory-budget", type=parse_size, default=None,
+                        help="Total memory for running jobs, e.g. 16GiB (default: 75%% of RAM)")
+    parser.add_argument("--dry-run", action="store_true", help="Print the planned jobs and exit")
+    args = parser.parse_args()
+
+    with open(args.config, "r") as f:
+        config = json.load(f)
+
+    jobs = plan_build(config)
+    memory_budget_mb = (args.memory_budget // (1024 * 1024) if args.memory_budget
+                        else total_memory_mb() * 3 // 4)
+
+    print(f"Planned {len(jobs)} jobs ({args.jobs} parallel, {memory_budget_mb} MiB budget)")
+    if args.dry_run:
+        for job in jobs:
+            deps = f" <- {', '.join(job['deps'])}" if job["deps"] else ""
+            print(f"  {job['name']}{deps}")
+        return
+
+    Path(config.get("rrd_dir", "public/rrd")).mkdir(parents=True, exist_ok=True)
+    Path(config.get("thumbnail_dir", "public/thumbnails")).mkdir(parents=True, exist_ok=True)
+
+    start = time.monotonic()
+    failed = run_jobs(jobs, args.jobs, memory_budget_mb)
+    print(f"\nBuild finished in {time.monotonic() - start:.1f}s: "
+          f"{len(jobs) - len(failed)} succeeded, {len(failed)} failed")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Checkpointed, resumable output for long conversions.
+
+A conversion writes its recording as a series of finalized segment files in
+`<output>.parts/`. Every `interval` seconds of wall time the current segment
+is closed and `checkpoint.json` records it together with the input position
+the next segment starts from (an MCAP log_time, or a Lumos timestamp that the
+camera streams turn back into a frame index). If the process dies, at most one
+interval of work is lost: `--resume` reopens the checkpoint, the converter
+seeks its inputs to `resume_from`, and on completion the segments, which all
+share one recording id, are stitched with `rerun rrd merge`.
+"""
+import os
+import json
+import time
+import uuid
+from pathlib import Path
+
+from optimize_rrd import rerun_cli
+
+# Wall-clock seconds between checkpoints
+DEFAULT_CHECKPOINT_INTERVAL = 300.0
+
+
+def input_signature(paths: list, **options) -> dict:
+    """Identify the inputs and options a checkpoint belongs to.
+
+    `options` must include everything that changes the output (clip window,
+    precision, encoder, ...); settings that only change speed can be left out.
+    """
+    files = []
+    for path in paths:
+        stat = Path(path).stat()
+        files.append([str(path), stat.st_size, stat.st_mtime_ns])
+    return {"files": files, "options": {key: repr(value) for key, value in sorted(options.items())}}
+
+
+class Segments:
+    """Segment files and checkpoint state for one output recording."""
+
+    def __init__(self, output_path: Path, signature: dict, interval: float = DEFAULT_CHECKPOINT_INTERVAL,
+                 resume: bool = False):
+        self.output_path = Path(output_path)
+        self.parts_dir = self.output_path.with_name(self.output_path.name + ".parts")
+        self.checkpoint_path = self.parts_dir / "checkpoint.json"
+        self.interval = interval
+        self.state = None
+
+        if resume and self.checkpoint_path.exists():
+            with open(self.checkpoint_path, "r") as f:
+                state = json.load(f)
+            if state.get("signature") == signature:
+                self.state = state
+                print(f"  Resuming after {len(state['segments'])} segments "
+                      f"from position {state['resume_from']}")
+            else:
+                print("  Warning: Inputs or options changed since the checkpoint, starting over")
+        elif resume:
+            print("  No checkpoint found, starting from the beginning")
+
+        if self.state is None:
+            self.state = {"signature": signature, "recording_id": str(uuid.uuid4()),
+                          "segments": [], "resume_from": None, "extra": None}
+        self.parts_dir.mkdir(parents=True, exist_ok=True)
+        # Segments that were being written when the last run died are incomplete
+        finished = {segment["file"] for segment in self.state["segments"]}
+        for path in self.parts_dir.glob("segment_*.rrd"):
+            if path.name not in finished:
+                path.unlink()
+        self.save_state()
+
+    @property
+    def recording_id(self) -> str:
+        return self.state["recording_id"]
+
+    @property
+    def resume_from(self):
+        """Input position to continue from, or None for a fresh conversion."""
+        return self.state["resume_from"]
+
+    @property
+    def extra(self):
+        """Converter state saved with the last checkpoint, or None."""
+        return self.state.get("extra")
+
+    def open(self) -> str:
+        """Path of the next segment file to pass to rr.save."""
+        self.current = f"segment_{len(self.state['segments']):04d}.rrd"
+        self.opened_at = time.monotonic()
+        return str(self.parts_dir / self.current)
+
+    def due(self) -> bool:
+        """True once the current segment has been open for a full interval."""
+        return self.interval > 0 and time.monotonic() - self.opened_at >= self.interval
+
+    def cut(self, resume_from, extra=None):
+        """Finalize the current segment and start a new one at `resume_from`.
+
+        Every input before `resume_from` must already have been logged, and
+        nothing at or after it. `extra` is JSON state the converter needs to
+        continue, returned by `extra` after a resume.
+        """
+        import rerun as rr
+        from rrd_writer import finish_recording
+
+        finish_recording()
+        self.state["segments"].append({"file": self.current, "resume_from": resume_from})
+        self.state["resume_from"] = resume_from
+        self.state["extra"] = extra
+        self.save_state()
+        print(f"  Checkpoint {len(self.state['segments'])} at position {resume_from}")
+        rr.save(self.open())
+
+    def finish(self):
+        """Finalize the last segment and stitch all segments into the output."""
+        from rrd_writer import finish_recording
+
+        finish_recording()
+        files = [segment["file"] for segment in self.state["segments"]] + [self.current]
+        paths = [str(self.parts_dir / name) for name in files]
+        if len(paths) == 1:
+            os.replace(paths[0], self.output_path)
+        else:
+            print(f"  Stitching {len(paths)} segments...")
+            tmp_path = self.output_path.with_name(self.output_path.name + ".stitching")
+            result = rerun_cli("rrd", "merge", *paths, "-o", str(tmp_path))
+            if result.returncode != 0:
+                tmp_path.unlink(missing_ok=True)
+                raise RuntimeError(f"rerun rrd merge failed: {result.stderr.strip().splitlines()[-1:]}")
+            os.replace(tmp_path, self.output_path)
+        for path in paths:
+            Path(path).unlink(missing_ok=True)
+        self.checkpoint_path.unlink(missing_ok=True)
+        self.parts_dir.rmdir()
+
+    def save_state(self):
+        tmp_path = self.checkpoint_path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_path, self.checkpoint_path)
+
+
+def add_checkpoint_args(parser):
+    """Add the checkpoint/resume options to a converter CLI."""
+    parser.add_argument("--checkpoint-interval", type=float, default=DEFAULT_CHECKPOINT_INTERVAL,
+                        help="Seconds between checkpoints of long conversions, 0 to disable "
+                             f"(default: {DEFAULT_CHECKPOINT_INTERVAL:.0f})")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue an interrupted conversion from its last checkpoint")
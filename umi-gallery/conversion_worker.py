@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Long-lived conversion worker.
+
+Starting an interpreter and importing rerun/cv2/pyarrow/pandas costs seconds,
+which dominates batches of small episodes. The worker pays that once and then
+runs conversion jobs in-process, reusing loaded libraries and cached decoder
+state (e.g. generated protobuf classes for MCAP schemas) across jobs.
+
+Jobs are JSON lines, read from stdin or from a local Unix socket:
+    {"id": 1, "script": "convert_lerobot_to_rrd", "argv": ["source-data/lerobot-data/dm_insert", "--episode", "1"]}
+    {"id": 2, "job": "convert_lumos", "kwargs": {"source": "...", "output": "public/rrd/lumos_task1.rrd"}}
+
+`script` runs a converter's main(argv); `job` runs one of the build_gallery
+job functions. Each job gets one JSON line back:
+    {"id": 1, "ok": true, "elapsed": 3.2}
+Job output is written to stderr so stdout stays a clean response stream.
+
+Usage:
+    python conversion_worker.py < jobs.jsonl
+    python conversion_worker.py --socket /tmp/umi-worker.sock
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import importlib
+import traceback
+from pathlib import Path
+
+# Entry points the worker will run
+SCRIPTS = (
+    "convert_mcap_to_rrd",
+    "convert_lerobot_to_rrd",
+    "convert_tacexo_to_rrd",
+    "convert_lumos_to_rrd",
+    "optimize_rrd",
+)
+
+PRELOAD_MODULES = ("numpy", "rerun", "cv2", "pyarrow.parquet", "pandas", "mcap.reader", "mcap_protobuf.decoder")
+
+
+def preload():
+    """Import the heavy libraries up front so the first job is as fast as the rest."""
+    for name in PRELOAD_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            print(f"Warning: could not preload {name}: {e}", file=sys.stderr)
+
+
+def run_request(request: dict) -> dict:
+    """Run one job request and return its response."""
+    response = {"id": request.get("id")}
+    start = time.monotonic()
+    stdout = sys.stdout
+    sys.stdout = sys.stderr
+    try:
+        if "script" in request:
+            if request["script"] not in SCRIPTS:
+                raise ValueError(f"Unknown script: {request['script']}")
+            module = importlib.import_module(request["script"])
+            module.main(list(request.get("argv", [])))
+        elif "job" in request:
+            import build_gallery
+            func = getattr(build_gallery, request["job"], None)
+            if func is None or not callable(func):
+                raise ValueError(f"Unknown job: {request['job']}")
+            func(**request.get("kwargs", {}))
+        else:
+            raise ValueError("Request needs a 'script' or 'job' field")
+        response["ok"] = True
+    except SystemExit as e:
+        # Converters exit on bad arguments or missing inputs
+        response["ok"] = e.code in (None, 0)
+        if not response["ok"]:
+            response["error"] = f"exit code {e.code}"
+    except Exception as e:
+        traceback.print_exc()
+        response["ok"] = False
+        response["error"] = str(e)
+    finally:
+        sys.stdout.flush()
+        sys.stdout = stdout
+    response["elapsed"] = round(time.monotonic() - start, 3)
+    return response
+
+
+def serve_lines(lines, reply):
+    """Handle a stream of JSON job lines, replying to each with `reply(dict)`."""
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as e:
+            reply({"id": None, "ok": False, "error": f"invalid JSON: {e}"})
+            continue
+        reply(run_request(request))
+
+
+def serve_stdin():
+    def reply(response):
+        sys.stdout.write(json.dumps(response) + "\n")
+        sys.stdout.flush()
+
+    serve_lines(sys.stdin, reply)
+
+
+def serve_socket(socket_path: Path):
+    """Accept connections on a Unix socket; jobs run one at a time."""
+    if socket_path.exists():
+        socket_path.unlink()
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(str(socket_path))
+    server.listen()
+    print(f"Worker listening on {socket_path}", file=sys.stderr)
+    try:
+        while True:
+            conn, _ = server.accept()
+            with conn, conn.makefile("r") as reader, conn.makefile("w") as writer:
+                def reply(response):
+                    writer.write(json.dumps(response) + "\n")
+                    writer.flush()
+
+                try:
+                    serve_lines(reader, reply)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        socket_path.unlink(missing_ok=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run conversion jobs in a persistent process")
+    parser.add_argument("--socket", type=Path, default=None, help="Serve on a Unix socket instead of stdin")
+    parser.add_argument("--no-preload", dest="preload", action="store_false",
+                        help="Import libraries on first use instead of at startup")
+    args = parser.parse_args()
+
+    # Converter modules live next to this file
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+    if args.preload:
+        preload()
+
+    if args.socket is not None:
+        serve_socket(args.socket)
+    else:
+        serve_stdin()
+
+
+if __name__ == "__main__":
+    main()
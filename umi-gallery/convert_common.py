@@ -0,0 +1,92 @@
+"""
+Helpers shared by the converter command-line entry points.
+
+Heavy libraries (rerun, cv2, pyarrow, pandas, mcap) are imported inside the
+functions that use them, so `--help` and cached no-op runs start instantly.
+`check_dependencies` only looks the modules up without importing them.
+
+`--start`/`--end` clip bounds are parsed here and converted to seconds by
+each converter, which then seeks instead of reading from the beginning.
+
+`--scalar-precision` trims scalar streams before logging. Rerun stores
+`Scalars` as float64, so values are rounded to float32 precision or to a
+fixed-point step instead; the zeroed low mantissa bits and repeated values
+compress much better in the RRD.
+"""
+import sys
+import argparse
+import importlib.util
+
+INSTALL_HINT = "pip install rerun-sdk pyarrow opencv-python pandas mcap mcap-protobuf-support av"
+
+
+def check_dependencies(*modules: str):
+    """Exit with an install hint if any module is missing (without importing it)."""
+    missing = [name for name in modules if importlib.util.find_spec(name) is None]
+    if missing:
+        print(f"Missing dependency: {', '.join(missing)}")
+        print(f"Install with: {INSTALL_HINT}")
+        sys.exit(1)
+
+
+def parse_time_bound(text: str) -> tuple:
+    """Parse a --start/--end value: `12.5` or `12.5s` (seconds) or `300f` (frame index)."""
+    text = text.strip().lower()
+    try:
+        if text.endswith("f"):
+            return (int(text[:-1]), "frame")
+        return (float(text[:-1] if text.endswith("s") else text), "s")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid time: {text} (use seconds like 12.5 or frames like 300f)")
+
+
+def add_window_args(parser):
+    """Add --start/--end clipping options to a converter CLI."""
+    parser.add_argument("--start", type=parse_time_bound, default=None,
+                        help="Clip start, seconds from the recording start (12.5) or frame index (300f)")
+    parser.add_argument("--end", type=parse_time_bound, default=None,
+                        help="Clip end (exclusive), seconds (42) or frame index (1200f)")
+
+
+def bound_seconds(bound, fps: float = None, frame_times=None):
+    """Convert a parsed bound to seconds from the recording start.
+
+    Frame bounds use `frame_times` (per-frame times in seconds) when the
+    source has them, else the nominal `fps`.
+    """
+    if bound is None:
+        return None
+    value, unit = bound
+    if unit == "s":
+        return value
+    if frame_times is not None:
+        return float(frame_times[value]) if value < len(frame_times) else float("inf")
+    if not fps:
+        raise ValueError("frame bounds need a frame rate")
+    return value / fps
+
+
+SCALAR_PRECISIONS = ("float64", "float32", "quantize")
+DEFAULT_QUANTIZE_STEP = 1e-4
+
+
+def add_precision_args(parser):
+    """Add the scalar storage precision options to a converter CLI."""
+    parser.add_argument("--scalar-precision", choices=SCALAR_PRECISIONS, default="float64",
+                        help="Round scalar streams to float32 or to --quantize-step before logging "
+                             "(default: float64, values unchanged)")
+    parser.add_argument("--quantize-step", type=float, default=DEFAULT_QUANTIZE_STEP,
+                        help=f"Step for --scalar-precision quantize (default: {DEFAULT_QUANTIZE_STEP:g})")
+
+
+def scalar_rounder(precision: str = "float64", step: float = DEFAULT_QUANTIZE_STEP):
+    """Return a vectorized function that rounds values to the storage precision."""
+    import numpy as np
+
+    if precision == "float32":
+        return lambda values: np.asarray(values, dtype=np.float32).astype(np.float64)
+    if precision == "quantize":
+        if not step or step <= 0:
+            raise ValueError("--quantize-step must be positive")
+        return lambda values: np.round(np.asarray(values, dtype=np.float64) / step) * step
+    return lambda values: np.asarray(values, dtype=np.float64)
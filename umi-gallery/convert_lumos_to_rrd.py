@@ -1,39 +1,189 @@
 #!/usr/bin/env python3
 """
 Convert Lumos data to Rerun (.rrd) format.
-Usage: python3 convert_lumos_to_rrd.py <session_path> <output_path>
+Usage: python3 convert_lumos_to_rrd.py <session_path> <output_path> [--start 5 --end 20]
 """
 
 import sys
 import os
 import argparse
-import pandas as pd
-import numpy as np
-import cv2
-import rerun as rr
-import rerun.blueprint as rrb
 from pathlib import Path
 
-def convert_lumos_to_rrd(session_path: Path, output_path: Path):
-    print(f"Converting session: {session_path}")
-    print(f"Output to: {output_path}")
+from convert_common import check_dependencies, add_window_args, bound_seconds
+from rrd_writer import Event, ScalarColumns, merge_streams, write_events
+from frame_encoder import iter_encoded_frames, add_encode_args
+from optimize_rrd import optimize_rrd, add_optimize_args
+from checkpoint import Segments, input_signature, add_checkpoint_args, DEFAULT_CHECKPOINT_INTERVAL
+from memory_budget import add_memory_args, memory_budget, budget_recording
+
+TRAJECTORY_COLUMNS = ["t", "tx", "ty", "tz", "qx", "qy", "qz", "qw"]
+# Bytes per parsed trajectory row, for sizing CSV chunks
+TRAJECTORY_ROW_BYTES = 64
+
+
+def iter_trajectory_events(traj_data, hand_name: str):
+    """Yield the end-effector pose at each trajectory sample."""
+    import rerun as rr
+
+    t = traj_data["t"].values
+    translations = traj_data[["tx", "ty", "tz"]].values
+    quaternions = traj_data[["qx", "qy", "qz", "qw"]].values
+    for i in range(len(t)):
+        yield Event(float(t[i]), None, f"world/{hand_name}/eef", rr.Transform3D(
+            translation=translations[i],
+            rotation=rr.Quaternion(xyzw=quaternions[i])
+        ))
+
+
+def read_trajectory_chunks(traj_file: Path, chunk_rows: int):
+    """Read the trajectory file in DataFrame chunks of `chunk_rows` rows."""
+    import pandas as pd
+
+    return pd.read_csv(traj_file, sep=" ", header=None, names=TRAJECTORY_COLUMNS, chunksize=chunk_rows)
+
+
+def scan_trajectory(traj_file: Path, chunk_rows: int) -> tuple:
+    """First pass over a chunked trajectory: (first timestamp, decimated path, first position).
+
+    The path keeps at most `chunk_rows` points; the stride doubles whenever it fills up.
+    """
+    import numpy as np
+
+    first_t, first_pos, stride, kept, seen = None, None, 1, [], 0
+    for chunk in read_trajectory_chunks(traj_file, chunk_rows):
+        positions = chunk[["tx", "ty", "tz"]].values
+        if first_t is None and len(chunk):
+            first_t, first_pos = float(chunk["t"].iloc[0]), positions[0]
+        # Rows whose global index is a multiple of the stride
+        offset = (-seen) % stride
+        kept.append(positions[offset::stride])
+        seen += len(chunk)
+        while sum(len(part) for part in kept) > chunk_rows:
+            stride *= 2
+            path = np.concatenate(kept)
+            kept = [path[::2]]
+    path = np.concatenate(kept) if kept else np.empty((0, 3))
+    return first_t, path, first_pos
+
+
+def iter_trajectory_chunk_events(traj_file: Path, hand_name: str, chunk_rows: int,
+                                 start_time: float = None, end_time: float = None, budget=None):
+    """Stream pose events from the trajectory file one chunk at a time."""
+    for chunk in read_trajectory_chunks(traj_file, chunk_rows):
+        if start_time is not None:
+            chunk = chunk[chunk["t"] >= start_time]
+        if end_time is not None:
+            chunk = chunk[chunk["t"] < end_time]
+        yield from iter_trajectory_events(chunk, hand_name)
+        if budget is not None:
+            budget.check()
 
-    # Initialize Rerun
-    rr.init(session_path.name, spawn=False)
-    rr.save(str(output_path))
+
+def iter_camera_events(video_file: Path, video_timestamps, hand_name: str,
+                       start_time: float = None, end_time: float = None,
+                       jpeg_backend: str = "auto", encode_threads: int = 1):
+    """Yield JPEG-compressed camera frames stamped with timestamps.csv.
+
+    With a [start_time, end_time) window the frame range is found by binary
+    search on the stamps and the decoder seeks straight to the first frame.
+    """
+    import rerun as rr
+    import numpy as np
+    import cv2
+
+    stamps = video_timestamps["header_stamp"].values
+    first = int(np.searchsorted(stamps, start_time, side="left")) if start_time is not None else 0
+    last = int(np.searchsorted(stamps, end_time, side="left")) if end_time is not None else len(stamps)
+    if first >= last:
+        return
+
+    cap = cv2.VideoCapture(str(video_file))
+    if not cap.isOpened():
+        return
+    if first > 0:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, first)
     
-    # Define and send Blueprint
-    blueprint = rrb.Blueprint(
-        rrb.Vertical(
-            rrb.Spatial3DView(name="3D Trajectory", origin="world"),
-            rrb.Horizontal(
-                rrb.Spatial2DView(name="Left Camera", origin="world/left_hand/camera"),
-                rrb.Spatial2DView(name="Right Camera", origin="world/right_hand/camera"),
-            ),
-            row_shares=[2, 1]
-        )
-    )
-    rr.send_blueprint(blueprint)
+    try:
+        # Compress to JPEG straight from the decoder's BGR frames
+        frames = iter_encoded_frames(cap, 80, last - first, jpeg_backend, encode_threads)
+        for frame_idx, jpeg_data in enumerate(frames, start=first):
+            yield Event(float(stamps[frame_idx]), None, f"world/{hand_name}/camera",
+                        rr.EncodedImage(contents=jpeg_data, media_type="image/jpeg"))
+    finally:
+        cap.release()
+
+
+def load_clamp_data(clamp_file: Path):
+    """Load a TUM-style clamp file (timestamp width) with pandas' C parser."""
+    import numpy as np
+    import pandas as pd
+
+    clamp_data = pd.read_csv(clamp_file, sep=" ", header=None, names=["t", "width"], usecols=[0, 1],
+                             dtype=np.float64, engine="c")
+    if not clamp_data["t"].is_monotonic_increasing:
+        clamp_data = clamp_data.sort_values("t", kind="stable")
+    return clamp_data
+
+
+def resample_to_clock(clamp_data, stamps):
+    """As-of join: the latest clamp reading at or before each video timestamp.
+
+    Frames before the first clamp reading are dropped.
+    """
+    import pandas as pd
+
+    clock = pd.DataFrame({"t": stamps.astype("float64")})
+    return pd.merge_asof(clock, clamp_data, on="t", direction="backward").dropna(subset=["width"])
+
+
+def gripper_columns(clamp_data, hand_name: str, start_time: float = None, end_time: float = None):
+    """The gripper width series of one hand within [start_time, end_time), as columns."""
+    t = clamp_data["t"].to_numpy()
+    width = clamp_data["width"].to_numpy()
+    if start_time is not None or end_time is not None:
+        keep = (t >= (start_time if start_time is not None else -float("inf"))) & \
+               (t < (end_time if end_time is not None else float("inf")))
+        t, width = t[keep], width[keep]
+    return ScalarColumns(f"world/{hand_name}/gripper/width", t, width)
+
+
+def clip_window(hands: list, start=None, end=None) -> tuple:
+    """Resolve --start/--end bounds to absolute session timestamps.
+
+    Bounds are relative to the earliest sample of any hand; frame bounds
+    count frames of the first hand camera.
+    """
+    if start is None and end is None:
+        return None, None
+    firsts = [hand["first_t"] for hand in hands if hand["first_t"] is not None]
+    firsts += [hand["stamps"]["header_stamp"].iloc[0] for hand in hands
+               if hand["stamps"] is not None and len(hand["stamps"])]
+    origin = float(min(firsts)) if firsts else 0.0
+    cameras = [hand["stamps"]["header_stamp"].values - origin for hand in hands if hand["stamps"] is not None]
+    frame_times = cameras[0] if cameras else None
+
+    start_s = bound_seconds(start, frame_times=frame_times)
+    end_s = bound_seconds(end, frame_times=frame_times)
+    print(f"Clip: {start_s or 0:.2f}s to " + (f"{end_s:.2f}s" if end_s is not None else "end")
+          + " from session start")
+    return (origin + start_s if start_s is not None else None,
+            origin + end_s if end_s is not None else None)
+
+
+def convert_lumos_to_rrd(session_path: Path, output_path: Path, start=None, end=None,
+                         checkpoint_interval: float = DEFAULT_CHECKPOINT_INTERVAL, resume: bool = False,
+                         clamp_clock: str = "clamp", jpeg_backend: str = "auto", encode_threads: int = 1,
+                         budget=None):
+    """Convert a Lumos session; `clamp_clock="video"` resamples gripper width onto camera frames.
+
+    With a memory budget the trajectories are streamed in CSV chunks instead of loaded whole.
+    """
+    import pandas as pd
+    import rerun as rr
+    import rerun.blueprint as rrb
+
+    print(f"Converting session: {session_path}")
+    print(f"Output to: {output_path}")
 
     # Define paths
     # Find the hand directory (assuming 'left_hand_*' or similar)
@@ -42,110 +192,167 @@ def convert_lumos_to_rrd(session_path: Path, output_path: Path):
         print(f"Error: No hand directory found in {session_path}")
         return
     
-    for hand_dir in hand_dirs:
-        # Determine hand name for namespacing (e.g., 'left_hand', 'right_hand')
-        # Assuming directory name contains 'left_hand' or 'right_hand'
-        hand_name = "left_hand" if "left_hand" in hand_dir.name else "right_hand"
-        if "right_hand" not in hand_dir.name and "left_hand" not in hand_dir.name:
-             # Fallback or use full name
-             hand_name = hand_dir.name
+    # Initialize Rerun; the output is written as checkpointed segments
+    inputs = sorted(p for p in session_path.glob("*_hand_*/**/*") if p.is_file())
+    # Every option that changes the output, so segments written with other options are not reused
+    signature = input_signature(inputs, start=start, end=end, clamp_clock=clamp_clock, jpeg_backend=jpeg_backend,
+                                memory_budget=budget.limit if budget else None)
+    segments = Segments(output_path, signature, checkpoint_interval, resume)
+    with budget_recording(budget):
+        rr.init(session_path.name, spawn=False, recording_id=segments.recording_id)
+        rr.save(segments.open())
         
-        print(f"Processing hand: {hand_name} (Directory: {hand_dir.name})")
-
-        traj_file = hand_dir / "Merged_Trajectory" / "merged_trajectory.txt"
-        clamp_file = hand_dir / "Clamp_Data" / "clamp_data_tum.txt"
-        video_path = hand_dir / "RGB_Images"
-        video_file = video_path / "video.mp4"
-        timestamps_file = video_path / "timestamps.csv"
-
-        # Load Data
-        # 1. Trajectory (Timestamp, tx, ty, tz, qx, qy, qz, qw)
-        print(f"  Loading trajectory for {hand_name}...")
-        if traj_file.exists():
-            traj_data = pd.read_csv(traj_file, sep=" ", header=None, 
-                                    names=["t", "tx", "ty", "tz", "qx", "qy", "qz", "qw"])
-            # Log static trajectory path
-            rr.log(f"world/{hand_name}/trajectory_path", rr.Points3D(
-                positions=traj_data[["tx", "ty", "tz"]].values,
-                colors=[[100, 100, 255]] * len(traj_data) if "left" in hand_name else [[255, 100, 100]] * len(traj_data),
-                radii=[0.002] * len(traj_data)
-            ), static=True)
-            
-            # Log Start Label
-            start_pos = traj_data.iloc[0][["tx", "ty", "tz"]].values
-            label_text = "Left Hand (Blue)" if "left" in hand_name else "Right Hand (Red)"
-            rr.log(f"world/{hand_name}/start_label", rr.Points3D(
-                positions=[start_pos],
-                labels=[label_text],
-                colors=[[100, 100, 255]] if "left" in hand_name else [[255, 100, 100]],
-                radii=[0.01], 
-            ), static=True)
-
-            # Log dynamic pose
-            for idx, row in traj_data.iterrows():
-                rr.set_time_seconds("timestamp", row["t"])
-                rr.log(f"world/{hand_name}/eef", rr.Transform3D(
-                    translation=[row["tx"], row["ty"], row["tz"]],
-                    rotation=rr.Quaternion(xyzw=[row["qx"], row["qy"], row["qz"], row["qw"]])
-                ))
-        else:
-            print(f"  Warning: merged_trajectory.txt not found for {hand_name}")
-
-        # 2. Clamp Data (Timestamp, width)
-        # print(f"  Loading clamp data for {hand_name}...")
-        # if clamp_file.exists():
-        #    clamp_data = pd.read_csv(clamp_file, sep=" ", header=None, names=["t", "width"])
-        #    for idx, row in clamp_data.iterrows():
-        #        rr.set_time_seconds("timestamp", row["t"])
-        #        # rr.log(f"world/{hand_name}/gripper/width", rr.Scalar(row["width"]))
-        #        pass
-        # else:
-        #    # print(f"  Warning: clamp_data_tum.txt not found for {hand_name}")
-        #    pass
-
-        # 3. Video
-        print(f"  Loading video for {hand_name}...")
-        if video_file.exists() and timestamps_file.exists():
-            video_timestamps = pd.read_csv(timestamps_file)
-            cap = cv2.VideoCapture(str(video_file))
+        # Define and send Blueprint
+        blueprint = rrb.Blueprint(
+            rrb.Vertical(
+                rrb.Spatial3DView(name="3D Trajectory", origin="world"),
+                rrb.Horizontal(
+                    rrb.Spatial2DView(name="Left Camera", origin="world/left_hand/camera"),
+                    rrb.Spatial2DView(name="Right Camera", origin="world/right_hand/camera"),
+                ),
+                rrb.TimeSeriesView(name="Gripper Width", origin="world", contents="world/*/gripper/**"),
+                row_shares=[2, 1, 1]
+            )
+        )
+        rr.send_blueprint(blueprint)
+
+        # Load each hand and log its static data; the time-varying streams are
+        # created afterwards, once the clip window is known
+        hands = []
+        for hand_dir in hand_dirs:
+            # Determine hand name for namespacing (e.g., 'left_hand', 'right_hand')
+            # Assuming directory name contains 'left_hand' or 'right_hand'
+            hand_name = "left_hand" if "left_hand" in hand_dir.name else "right_hand"
+            if "right_hand" not in hand_dir.name and "left_hand" not in hand_dir.name:
+                 # Fallback or use full name
+                 hand_name = hand_dir.name
             
-            frame_idx = 0
-            while cap.isOpened():
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                
-                if frame_idx < len(video_timestamps):
-                    ts = video_timestamps.iloc[frame_idx]["header_stamp"]
-                    rr.set_time_seconds("timestamp", ts)
-                    
-                    if "left" in hand_name:
-                        # Translate camera visualization slightly if needed, or just log image
-                        # For Rerun 2D image, we just log it. 
-                        # If we want 3D camera frustum, we need calibration. 
-                        # For now, just logging image to a separate entity.
-                        pass
-                    
-                    # Compress to JPEG
-                    img_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    rr.log(f"world/{hand_name}/camera", rr.Image(img_rgb).compress(jpeg_quality=80))
+            print(f"Processing hand: {hand_name} (Directory: {hand_dir.name})")
+
+            traj_file = hand_dir / "Merged_Trajectory" / "merged_trajectory.txt"
+            clamp_file = hand_dir / "Clamp_Data" / "clamp_data_tum.txt"
+            video_path = hand_dir / "RGB_Images"
+            video_file = video_path / "video.mp4"
+            timestamps_file = video_path / "timestamps.csv"
+
+            hand = {"name": hand_name, "traj": None, "traj_file": None, "first_t": None, "clamp": None,
+                    "video_file": video_file, "stamps": None}
+            hands.append(hand)
+
+            # Load Data
+            # 1. Trajectory (Timestamp, tx, ty, tz, qx, qy, qz, qw)
+            print(f"  Loading trajectory for {hand_name}...")
+            if traj_file.exists():
+                if budget is not None:
+                    # Only a decimated path is kept; the poses are re-read in chunks later
+                    first_t, path, start_pos = scan_trajectory(traj_file, budget.batch_rows(TRAJECTORY_ROW_BYTES))
+                    hand["traj_file"], hand["first_t"] = traj_file, first_t
+                else:
+                    traj_data = pd.read_csv(traj_file, sep=" ", header=None, names=TRAJECTORY_COLUMNS)
+                    path = traj_data[["tx", "ty", "tz"]].values
+                    start_pos = traj_data.iloc[0][["tx", "ty", "tz"]].values
+                    hand["traj"], hand["first_t"] = traj_data, float(traj_data["t"].iloc[0])
+                # Log static trajectory path
+                rr.log(f"world/{hand_name}/trajectory_path", rr.Points3D(
+                    positions=path,
+                    colors=[[100, 100, 255]] * len(path) if "left" in hand_name else [[255, 100, 100]] * len(path),
+                    radii=[0.002] * len(path)
+                ), static=True)
                 
-                frame_idx += 1
-            cap.release()
-        else:
-            print(f"  Warning: Video or timestamps not found for {hand_name}")
+                # Log Start Label
+                label_text = "Left Hand (Blue)" if "left" in hand_name else "Right Hand (Red)"
+                rr.log(f"world/{hand_name}/start_label", rr.Points3D(
+                    positions=[start_pos],
+                    labels=[label_text],
+                    colors=[[100, 100, 255]] if "left" in hand_name else [[255, 100, 100]],
+                    radii=[0.01], 
+                ), static=True)
+            else:
+                print(f"  Warning: merged_trajectory.txt not found for {hand_name}")
+
+            # 2. Clamp Data (Timestamp, width)
+            print(f"  Loading clamp data for {hand_name}...")
+            if clamp_file.exists():
+                hand["clamp"] = load_clamp_data(clamp_file)
+            else:
+                print(f"  Warning: clamp_data_tum.txt not found for {hand_name}")
+
+            # 3. Video
+            print(f"  Loading video for {hand_name}...")
+            if video_file.exists() and timestamps_file.exists():
+                hand["stamps"] = pd.read_csv(timestamps_file)
+            else:
+                print(f"  Warning: Video or timestamps not found for {hand_name}")
+
+        start_time, end_time = clip_window(hands, start, end)
+        if segments.resume_from is not None:
+            # Everything before the checkpoint is already in finished segments
+            start_time = max(start_time, segments.resume_from) if start_time is not None else segments.resume_from
+
+        # Gripper width is one column per hand, sliced at each checkpoint by the writer
+        columns = []
+        for hand in hands:
+            if hand["clamp"] is None:
+                continue
+            clamp_data = hand["clamp"]
+            if clamp_clock == "video" and hand["stamps"] is not None:
+                clamp_data = resample_to_clock(clamp_data, hand["stamps"]["header_stamp"].values)
+            columns.append(gripper_columns(clamp_data, hand["name"], start_time, end_time))
+            print(f"  {len(columns[-1])} gripper widths for {hand['name']} ({clamp_clock} clock)")
+
+        # Per-hand trajectory and camera streams, merged by time before writing
+        streams = []
+        for hand in hands:
+            if hand["traj"] is not None:
+                traj_data = hand["traj"]
+                if start_time is not None:
+                    traj_data = traj_data[traj_data["t"] >= start_time]
+                if end_time is not None:
+                    traj_data = traj_data[traj_data["t"] < end_time]
+                # Dynamic pose
+                streams.append(iter_trajectory_events(traj_data, hand["name"]))
+            elif hand["traj_file"] is not None:
+                streams.append(iter_trajectory_chunk_events(
+                    hand["traj_file"], hand["name"], budget.batch_rows(TRAJECTORY_ROW_BYTES),
+                    start_time, end_time, budget))
+            if hand["stamps"] is not None:
+                streams.append(iter_camera_events(hand["video_file"], hand["stamps"], hand["name"],
+                                                  start_time, end_time, jpeg_backend, encode_threads))
+
+        print(f"Writing {len(streams)} streams in time order...")
+        count = write_events(merge_streams(streams), segments, budget, columns)
+        print(f"  Logged {count} events")
+        segments.finish()
+    if budget is not None:
+        budget.report()
 
     print("Conversion complete.")
 
-if __name__ == "__main__":
+def main(argv=None):
     parser = argparse.ArgumentParser(description="Convert Lumos data to Rerun (.rrd) format.")
     parser.add_argument("session_path", type=Path, help="Path to the session directory")
     parser.add_argument("output_path", type=Path, help="Output path for the .rrd file")
-    args = parser.parse_args()
+    parser.add_argument("--clamp-clock", choices=["clamp", "video"], default="clamp",
+                        help="Log gripper width at its own timestamps or resampled onto the camera frames")
+    add_encode_args(parser)
+    add_window_args(parser)
+    add_memory_args(parser)
+    add_checkpoint_args(parser)
+    add_optimize_args(parser)
+    args = parser.parse_args(argv)
+    check_dependencies("rerun", "pandas", "cv2")
     
     if not args.session_path.exists():
         print(f"Error: Session path {args.session_path} does not exist.")
         sys.exit(1)
         
     args.output_path.parent.mkdir(parents=True, exist_ok=True)
-    convert_lumos_to_rrd(args.session_path, args.output_path)
+    convert_lumos_to_rrd(args.session_path, args.output_path, args.start, args.end,
+                         args.checkpoint_interval, args.resume, args.clamp_clock,
+                         args.jpeg_backend, args.encode_threads, memory_budget(args.memory_budget))
+    if args.optimize and args.output_path.exists():
+        optimize_rrd(args.output_path, args.max_rows, args.max_bytes)
+
+
+if __name__ == "__main__":
+    main()
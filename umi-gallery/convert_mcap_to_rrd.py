@@ -10,17 +10,24 @@ The standard `rerun mcap convert` fails on these files because:
 This script manually extracts:
 - CompressedImage (camera feeds)
 - PoseInFrame (end-effector poses)
-- IMUMeasurement (IMU data)
+- IMUMeasurement (3-axis IMU data, logged in columnar batches)
 
 And skips problematic channels like RobotInfo and SystemInfo.
 """
 import sys
 import os
+import argparse
 from pathlib import Path
-from mcap.reader import make_reader
-from mcap_protobuf.decoder import DecoderFactory
-import rerun as rr
-import numpy as np
+
+from convert_common import (
+    check_dependencies, add_window_args, bound_seconds, add_precision_args, scalar_rounder,
+    DEFAULT_QUANTIZE_STEP,
+)
+from optimize_rrd import optimize_rrd, add_optimize_args, DEFAULT_MAX_ROWS, DEFAULT_MAX_BYTES
+from sharding import add_shard_args, select_shard, mcap_items, run_items, ShardManifest
+from checkpoint import Segments, input_signature, add_checkpoint_args, DEFAULT_CHECKPOINT_INTERVAL
+from memory_budget import add_memory_args, memory_budget, budget_recording
+from h264_stream import H264Streams
 
 # Channels to skip (these cause the conversion to fail)
 SKIP_CHANNELS = [
@@ -30,8 +37,62 @@ SKIP_CHANNELS = [
     "/robot1/system_info",
 ]
 
-def convert_mcap_to_rrd(mcap_path: str, output_path: str = None):
-    """Convert an MCAP file to RRD format, skipping problematic channels."""
+# Protobuf decoders keyed by schema content, kept for the life of the process
+_DECODERS = {}
+
+
+def decode_protobuf_factory():
+    """Decoder factory that reuses generated message classes across files.
+
+    mcap_protobuf's DecoderFactory caches by schema id, which is only unique
+    within one file, so it is rebuilt per file. Keying on the schema content
+    instead lets a long-lived worker skip regenerating the protobuf classes.
+    """
+    from mcap.decoder import DecoderFactory as McapDecoderFactory
+    from mcap_protobuf.decoder import DecoderFactory
+
+    class CachingDecoderFactory(McapDecoderFactory):
+        def decoder_for(self, message_encoding, schema):
+            if schema is None:
+                return None
+            key = (message_encoding, schema.name, schema.encoding, schema.data)
+            if key not in _DECODERS:
+                _DECODERS[key] = DecoderFactory().decoder_for(message_encoding, schema)
+            return _DECODERS[key]
+
+    return CachingDecoderFactory()
+
+
+def nominal_camera_fps(summary) -> float:
+    """Frame rate of the busiest image channel, from the summary message counts."""
+    stats = summary.statistics if summary else None
+    if stats is None or stats.message_end_time <= stats.message_start_time:
+        return None
+    duration_s = (stats.message_end_time - stats.message_start_time) / 1e9
+    image_counts = []
+    for channel_id, channel in summary.channels.items():
+        # Schemaless channels (schema_id 0) have no entry in the summary
+        schema = summary.schemas.get(channel.schema_id)
+        if schema is not None and "CompressedImage" in schema.name:
+            image_counts.append(stats.channel_message_counts.get(channel_id, 0))
+    return max(image_counts) / duration_s if image_counts and max(image_counts) else None
+
+
+def convert_mcap_to_rrd(mcap_path: str, output_path: str = None, start=None, end=None,
+                        checkpoint_interval: float = DEFAULT_CHECKPOINT_INTERVAL, resume: bool = False,
+                        scalar_precision: str = "float64", quantize_step: float = DEFAULT_QUANTIZE_STEP,
+                        budget=None):
+    """Convert an MCAP file to RRD format, skipping problematic channels.
+
+    `start`/`end` are parsed --start/--end bounds relative to the first
+    message; the reader seeks to the window through the chunk index.
+    Checkpoints record the log_time to continue from with `resume`.
+    IMU and encoder values are rounded to `scalar_precision`.
+    The reader already streams chunk by chunk; a `budget` bounds the
+    recording's buffers and applies backpressure while logging.
+    """
+    from mcap.reader import make_reader
+    import rerun as rr
     
     mcap_path = Path(mcap_path)
     if output_path is None:
@@ -42,68 +103,114 @@ def convert_mcap_to_rrd(mcap_path: str, output_path: str = None):
     print(f"Converting: {mcap_path}")
     print(f"Output: {output_path}")
     
-    # Initialize Rerun recording
-    rr.init(mcap_path.stem, spawn=False)
-    rr.save(str(output_path))
+    round_values = scalar_rounder(scalar_precision, quantize_step)
+    imu = ImuBatcher(round_values)
+    # Codec state is per recording (build workers convert several files per process)
+    video = H264Streams()
     
-    with open(mcap_path, "rb") as f:
-        reader = make_reader(f, decoder_factories=[DecoderFactory()])
-        
-        msg_count = 0
-        skipped_count = 0
-        logged_by_type = {}
+    # Initialize Rerun recording; the output is written as checkpointed segments
+    # Every option that changes the output, so segments written with other options are not reused
+    signature = input_signature([mcap_path], start=start, end=end, scalar_precision=scalar_precision,
+                                quantize_step=quantize_step, memory_budget=budget.limit if budget else None)
+    segments = Segments(output_path, signature, checkpoint_interval, resume)
+    with budget_recording(budget):
+        rr.init(mcap_path.stem, spawn=False, recording_id=segments.recording_id)
+        rr.save(segments.open())
+        # H.264 parameter sets seen before the checkpoint
+        video.restore(segments.extra)
         
-        for schema, channel, message, decoded_msg in reader.iter_decoded_messages():
-            # Skip problematic channels
-            if channel.topic in SKIP_CHANNELS:
-                skipped_count += 1
-                continue
+        with open(mcap_path, "rb") as f:
+            reader = make_reader(f, decoder_factories=[decode_protobuf_factory()])
             
-            # Convert timestamp (nanoseconds to seconds)
-            time_ns = message.log_time
-            time_s = time_ns / 1e9
-            rr.set_time_seconds("timestamp", time_s)
+            window = {}
+            if start is not None or end is not None:
+                summary = reader.get_summary()
+                if summary is None or summary.statistics is None:
+                    raise ValueError(f"{mcap_path.name} has no summary statistics, cannot clip")
+                origin_ns = summary.statistics.message_start_time
+                fps = nominal_camera_fps(summary)
+                if start is not None:
+                    window["start_time"] = origin_ns + int(bound_seconds(start, fps) * 1e9)
+                if end is not None:
+                    window["end_time"] = origin_ns + int(bound_seconds(end, fps) * 1e9)
+                print(f"  Clip: {(window.get('start_time', origin_ns) - origin_ns) / 1e9:.2f}s to "
+                      + (f"{(window['end_time'] - origin_ns) / 1e9:.2f}s" if "end_time" in window else "end"))
+            if segments.resume_from is not None:
+                # Messages before the checkpoint are already in finished segments
+                window["start_time"] = max(window.get("start_time", 0), segments.resume_from)
             
-            schema_name = schema.name if schema else "unknown"
+            last_log_time = None
+            msg_count = 0
+            skipped_count = 0
+            logged_by_type = {}
             
-            try:
-                if "CompressedImage" in schema_name:
-                    # Log compressed image
-                    log_compressed_image(channel.topic, decoded_msg)
-                    logged_by_type["CompressedImage"] = logged_by_type.get("CompressedImage", 0) + 1
-                    
-                elif "PoseInFrame" in schema_name:
-                    # Log pose
-                    log_pose(channel.topic, decoded_msg)
-                    logged_by_type["PoseInFrame"] = logged_by_type.get("PoseInFrame", 0) + 1
-                    
-                elif "IMUMeasurement" in schema_name:
-                    # Log IMU data
-                    log_imu(channel.topic, decoded_msg)
-                    logged_by_type["IMUMeasurement"] = logged_by_type.get("IMUMeasurement", 0) + 1
-                    
-                elif "CameraCalibration" in schema_name:
-                    # Log camera info (just once typically)
-                    log_camera_calibration(channel.topic, decoded_msg)
-                    logged_by_type["CameraCalibration"] = logged_by_type.get("CameraCalibration", 0) + 1
-                    
-                elif "MagneticEncoderMeasurement" in schema_name:
-                    # Log encoder as scalar
-                    log_encoder(channel.topic, decoded_msg)
-                    logged_by_type["MagneticEncoderMeasurement"] = logged_by_type.get("MagneticEncoderMeasurement", 0) + 1
-                    
-                else:
-                    # Skip unknown types silently
-                    pass
-                    
-                msg_count += 1
+            for schema, channel, message, decoded_msg in reader.iter_decoded_messages(**window):
+                # Skip problematic channels
+                if channel.topic in SKIP_CHANNELS:
+                    skipped_count += 1
+                    continue
                 
-                if msg_count % 5000 == 0:
-                    print(f"  Processed {msg_count} messages...")
+                # Checkpoint between distinct log times, so resuming at a log_time is exact
+                if last_log_time is not None and message.log_time > last_log_time and segments.due():
+                    imu.flush()
+                    video.flush()
+                    segments.cut(message.log_time, video.state())
+                last_log_time = message.log_time
+                
+                # Convert timestamp (nanoseconds to seconds)
+                time_ns = message.log_time
+                time_s = time_ns / 1e9
+                rr.set_time("timestamp", timestamp=time_s)
+                
+                schema_name = schema.name if schema else "unknown"
+                
+                try:
+                    if "CompressedImage" in schema_name:
+                        # Log compressed image
+                        log_compressed_image(channel.topic, decoded_msg, video, message.log_time)
+                        logged_by_type["CompressedImage"] = logged_by_type.get("CompressedImage", 0) + 1
+                        
+                    elif "PoseInFrame" in schema_name:
+                        # Log pose
+                        log_pose(channel.topic, decoded_msg)
+                        logged_by_type["PoseInFrame"] = logged_by_type.get("PoseInFrame", 0) + 1
+                        
+                    elif "IMUMeasurement" in schema_name:
+                        # Buffer IMU data; it is logged in columnar batches
+                        imu.add(channel.topic, message.log_time, decoded_msg)
+                        logged_by_type["IMUMeasurement"] = logged_by_type.get("IMUMeasurement", 0) + 1
+                        
+                    elif "CameraCalibration" in schema_name:
+                        # Log camera info (just once typically)
+                        log_camera_calibration(channel.topic, decoded_msg)
+                        logged_by_type["CameraCalibration"] = logged_by_type.get("CameraCalibration", 0) + 1
+                        
+                    elif "MagneticEncoderMeasurement" in schema_name:
+                        # Log encoder as scalar
+                        log_encoder(channel.topic, decoded_msg, round_values)
+                        logged_by_type["MagneticEncoderMeasurement"] = logged_by_type.get("MagneticEncoderMeasurement", 0) + 1
+                        
+                    else:
+                        # Skip unknown types silently
+                        pass
+                        
+                    msg_count += 1
+                    if budget is not None:
+                        budget.tick()
                     
-            except Exception as e:
-                # Silently skip errors to avoid spam
-                continue
+                    if msg_count % 5000 == 0:
+                        print(f"  Processed {msg_count} messages...")
+                        
+                except Exception as e:
+                    # Silently skip errors to avoid spam
+                    continue
+        
+        imu.flush()
+        video.flush()
+        segments.finish()
+    video.report()
+    if budget is not None:
+        budget.report()
     
     print(f"\nConversion complete!")
     print(f"  Total logged: {msg_count}")
@@ -112,16 +219,17 @@ def convert_mcap_to_rrd(mcap_path: str, output_path: str = None):
     print(f"  Output: {output_path}")
     
     return str(output_path)
-# Track which entities have been initialized with VideoStream codec
-VIDEO_STREAM_INITIALIZED = set()
 
-def log_compressed_image(topic: str, msg):
+
+def log_compressed_image(topic: str, msg, video: H264Streams, log_time: int):
     """Log a compressed image/video to Rerun.
     
     Handles both:
     - JPEG/PNG images (using EncodedImage)
-    - H.264 video frames (using VideoStream)
+    - H.264 video frames (buffered per GOP in `video`, logged as VideoStream)
     """
+    import rerun as rr
+    
     # Extract image data
     data = bytes(msg.data)
     format_str = msg.format if hasattr(msg, 'format') else ""
@@ -131,16 +239,8 @@ def log_compressed_image(topic: str, msg):
     
     # Check if it's H.264 video
     if format_str == 'h264' or data[:4] == b'\x00\x00\x00\x01':
-        # H.264 NAL unit - use VideoStream
-        global VIDEO_STREAM_INITIALIZED
-        
-        if entity_path not in VIDEO_STREAM_INITIALIZED:
-            # First frame: initialize with codec, no sample yet
-            rr.log(entity_path, rr.VideoStream(codec=rr.VideoCodec.H264))
-            VIDEO_STREAM_INITIALIZED.add(entity_path)
-        
-        # Log the H.264 frame data as a sample
-        rr.log(entity_path, rr.VideoStream(codec=rr.VideoCodec.H264, sample=data))
+        # H.264 NAL units - use VideoStream, with keyframes marked
+        video.add(entity_path, log_time, data)
         
     elif data[:2] == b'\xff\xd8':
         # JPEG magic bytes
@@ -157,6 +257,8 @@ def log_compressed_image(topic: str, msg):
 
 def log_pose(topic: str, msg):
     """Log a pose to Rerun as a transform and 3D trajectory point."""
+    import rerun as rr
+    
     entity_path = topic.replace("/", "/").lstrip("/")
     
     # Extract position and orientation from the pose
@@ -186,24 +288,67 @@ def log_pose(topic: str, msg):
             ))
 
 
-def log_imu(topic: str, msg):
-    """Log IMU measurements to Rerun."""
-    entity_path = topic.replace("/", "/").lstrip("/")
-    
-    # Log angular velocity and linear acceleration as scalar arrays
-    if hasattr(msg, 'angular_velocity'):
-        av = msg.angular_velocity
-        magnitude = float(np.linalg.norm([av.x, av.y, av.z]))
-        rr.log(f"{entity_path}/angular_velocity", rr.Scalars([magnitude]))
-    
-    if hasattr(msg, 'linear_acceleration'):
-        la = msg.linear_acceleration
-        magnitude = float(np.linalg.norm([la.x, la.y, la.z]))
-        rr.log(f"{entity_path}/linear_acceleration", rr.Scalars([magnitude]))
+# IMU samples buffered per topic before one columnar send
+IMU_BATCH_SIZE = 4096
+IMU_FIELDS = ("angular_velocity", "linear_acceleration")
+
+
+class ImuBatcher:
+    """Collects IMU messages per topic and logs them as N x 3 columns.
+
+    Each field is logged as a three-series x/y/z plot at
+    `<topic>/<field>` plus its magnitude, computed over the whole batch, at
+    `<topic>/<field>_magnitude`.
+    """
+
+    def __init__(self, round_values=None, batch_size: int = IMU_BATCH_SIZE):
+        self.round_values = round_values
+        self.batch_size = batch_size
+        self.buffers = {}
+        self.named = set()
+
+    def add(self, topic: str, time_ns: int, msg):
+        entity_path = topic.lstrip("/")
+        for field in IMU_FIELDS:
+            if not hasattr(msg, field):
+                continue
+            vector = getattr(msg, field)
+            buffer = self.buffers.setdefault((entity_path, field), ([], []))
+            buffer[0].append(time_ns)
+            buffer[1].append((vector.x, vector.y, vector.z))
+            if len(buffer[0]) >= self.batch_size:
+                self.flush_buffer(entity_path, field)
+
+    def flush(self):
+        """Log everything buffered; call before cutting or closing the recording."""
+        for entity_path, field in list(self.buffers):
+            self.flush_buffer(entity_path, field)
+
+    def flush_buffer(self, entity_path: str, field: str):
+        import numpy as np
+        import rerun as rr
+
+        times, vectors = self.buffers.pop((entity_path, field))
+        if not times:
+            return
+        axes = np.array(vectors, dtype=np.float64)
+        magnitudes = np.linalg.norm(axes, axis=1)
+        if self.round_values is not None:
+            axes, magnitudes = self.round_values(axes), self.round_values(magnitudes)
+
+        path = f"{entity_path}/{field}"
+        if path not in self.named:
+            rr.log(path, rr.SeriesLines(names=["x", "y", "z"]), static=True)
+            self.named.add(path)
+        indexes = [rr.TimeColumn("timestamp", timestamp=np.array(times, dtype="datetime64[ns]"))]
+        rr.send_columns(path, indexes=indexes, columns=rr.Scalars.columns(scalars=axes))
+        rr.send_columns(f"{path}_magnitude", indexes=indexes, columns=rr.Scalars.columns(scalars=magnitudes))
 
 
 def log_camera_calibration(topic: str, msg):
     """Log camera calibration info."""
+    import rerun as rr
+    
     entity_path = topic.replace("/", "/").lstrip("/")
     
     # Just log as text annotation for now
@@ -211,40 +356,82 @@ def log_camera_calibration(topic: str, msg):
         rr.log(entity_path, rr.TextLog(f"Camera: {msg.width}x{msg.height}"))
 
 
-def log_encoder(topic: str, msg):
+def log_encoder(topic: str, msg, round_values=None):
     """Log magnetic encoder reading."""
+    import rerun as rr
+    
     entity_path = topic.replace("/", "/").lstrip("/")
     
     if hasattr(msg, 'value'):
-        rr.log(entity_path, rr.Scalars([float(msg.value)]))
+        value = [float(msg.value)]
+        rr.log(entity_path, rr.Scalars(round_values(value) if round_values else value))
+
 
+def convert_all_mcap_files(input_dir: str, output_dir: str, optimize: bool = True,
+                           max_rows: int = DEFAULT_MAX_ROWS, max_bytes: int = DEFAULT_MAX_BYTES,
+                           shard=None, convert_options: dict = None):
+    """Convert all MCAP files in a directory, or only shard (i, N) of them.
 
-def convert_all_mcap_files(input_dir: str, output_dir: str):
-    """Convert all MCAP files in a directory."""
+    `convert_options` are passed on to convert_mcap_to_rrd.
+    """
     input_dir = Path(input_dir)
     output_dir = Path(output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
     
-    mcap_files = list(input_dir.glob("*.mcap"))
-    print(f"Found {len(mcap_files)} MCAP files to convert\n")
+    items = select_shard(mcap_items(list(input_dir.glob("*.mcap"))), shard)
+    print(f"Found {len(items)} MCAP files to convert\n")
     
-    for mcap_file in mcap_files:
-        output_file = output_dir / mcap_file.with_suffix('.rrd').name
-        try:
-            convert_mcap_to_rrd(str(mcap_file), str(output_file))
-            print()
-        except Exception as e:
-            print(f"ERROR converting {mcap_file}: {e}")
-            continue
+    def convert(item):
+        output_file = output_dir / f"{item['id']}.rrd"
+        convert_mcap_to_rrd(item["source"], str(output_file), **(convert_options or {}))
+        if optimize:
+            optimize_rrd(output_file, max_rows, max_bytes)
+        print()
+        return [output_file]
+    
+    return run_items(items, ShardManifest(output_dir, shard, "rrd"), convert)
 
 
-if __name__ == "__main__":
-    if len(sys.argv) == 1:
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert MCAP files to Rerun RRD format")
+    parser.add_argument("mcap_path", nargs="?",
+                        help="MCAP file or directory (default: convert all of public/mcap to public/rrd)")
+    parser.add_argument("output_path", nargs="?",
+                        help="Output RRD path, or directory for a batch (default: next to the MCAP file)")
+    add_window_args(parser)
+    add_precision_args(parser)
+    add_memory_args(parser)
+    add_checkpoint_args(parser)
+    add_optimize_args(parser)
+    add_shard_args(parser)
+    args = parser.parse_args(argv)
+    check_dependencies("rerun", "mcap", "mcap_protobuf")
+    
+    convert_options = {
+        "checkpoint_interval": args.checkpoint_interval,
+        "resume": args.resume,
+        "scalar_precision": args.scalar_precision,
+        "quantize_step": args.quantize_step,
+        "budget": memory_budget(args.memory_budget),
+    }
+    if args.mcap_path is None or Path(args.mcap_path).is_dir():
+        if args.start is not None or args.end is not None:
+            parser.error("--start/--end need a single MCAP file")
         # Default: convert all files in public/mcap to public/rrd
-        convert_all_mcap_files("public/mcap", "public/rrd")
-    elif len(sys.argv) == 2:
-        # Single file
-        convert_mcap_to_rrd(sys.argv[1])
+        failed = convert_all_mcap_files(args.mcap_path or "public/mcap", args.output_path or "public/rrd",
+                                        args.optimize, args.max_rows, args.max_bytes, args.shard,
+                                        convert_options)
+        if failed:
+            sys.exit(1)
+    elif args.shard is not None:
+        parser.error("--shard needs a directory of MCAP files")
     else:
-        # Input and output specified
-        convert_mcap_to_rrd(sys.argv[1], sys.argv[2])
+        # Single file, output optional
+        rrd_path = convert_mcap_to_rrd(args.mcap_path, args.output_path, args.start, args.end,
+                                       **convert_options)
+        if args.optimize:
+            optimize_rrd(rrd_path, args.max_rows, args.max_bytes)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,11 @@
 #!/usr/bin/env python3
-import cv2
 import sys
 import argparse
 from pathlib import Path
 
 def extract_thumbnail(video_path, output_path):
+    import cv2
+
     print(f"Extracting thumbnail from {video_path} to {output_path}")
     cap = cv2.VideoCapture(str(video_path))
     if not cap.isOpened():
@@ -4,15 +4,19 @@ Extract first camera frame from each MCAP file and save as JPEG thumbnail.
 Since the camera data is H.264 encoded, we need to decode it using av (PyAV).
 """
 import sys
-from pathlib import Path
-from mcap.reader import make_reader
-from mcap_protobuf.decoder import DecoderFactory
-import av
 import io
+import argparse
+from pathlib import Path
+
+from sharding import add_shard_args, select_shard, mcap_items, run_items, ShardManifest
 
 
 def extract_thumbnail(mcap_path: str, output_dir: str = "public/thumbnails"):
     """Extract first camera frame and save as JPEG thumbnail."""
+    from mcap.reader import make_reader
+    from mcap_protobuf.decoder import DecoderFactory
+    import av
+
     mcap_path = Path(mcap_path)
     output_dir = Path(output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
@@ -113,25 +117,40 @@ def extract_thumbnail(mcap_path: str, output_dir: str = "public/thumbnails"):
     return None
 
 
-def extract_all_thumbnails(input_dir: str = "public/mcap", output_dir: str = "public/thumbnails"):
-    """Extract thumbnails from all MCAP files."""
+def extract_all_thumbnails(input_dir: str = "public/mcap", output_dir: str = "public/thumbnails", shard=None):
+    """Extract thumbnails from all MCAP files, or only shard (i, N) of them."""
     input_dir = Path(input_dir)
     output_dir = Path(output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
     
-    mcap_files = list(input_dir.glob("*.mcap"))
-    print(f"Found {len(mcap_files)} MCAP files\n")
+    items = select_shard(mcap_items(list(input_dir.glob("*.mcap"))), shard)
+    print(f"Found {len(items)} MCAP files\n")
     
-    for mcap_file in mcap_files:
-        try:
-            extract_thumbnail(str(mcap_file), str(output_dir))
-        except Exception as e:
-            print(f"  ERROR: {e}")
+    def extract(item):
+        output_path = extract_thumbnail(item["source"], str(output_dir))
         print()
+        if output_path is None:
+            raise RuntimeError("no thumbnail extracted")
+        return [output_path]
+    
+    return run_items(items, ShardManifest(output_dir, shard, "thumbnails"), extract)
 
 
-if __name__ == "__main__":
-    if len(sys.argv) == 1:
-        extract_all_thumbnails()
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract JPEG thumbnails from MCAP camera streams")
+    parser.add_argument("mcap_path", nargs="?", help="MCAP file or directory (default: public/mcap)")
+    parser.add_argument("output_dir", nargs="?", default="public/thumbnails",
+                        help="Output directory (default: public/thumbnails)")
+    add_shard_args(parser)
+    args = parser.parse_args(argv)
+
+    if args.mcap_path is None or Path(args.mcap_path).is_dir():
+        failed = extract_all_thumbnails(args.mcap_path or "public/mcap", args.output_dir, args.shard)
+        if failed:
+            sys.exit(1)
     else:
-        extract_thumbnail(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else "public/thumbnails")
+        extract_thumbnail(args.mcap_path, args.output_dir)
+
+
+if __name__ == "__main__":
+    main()
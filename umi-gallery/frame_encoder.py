@@ -0,0 +1,101 @@
+"""
+JPEG encode stage shared by the video loops.
+
+Frames are decoded into preallocated buffers (`cv2.VideoCapture.read` writes
+into a buffer of matching shape instead of allocating), encoded straight from
+the decoder's BGR layout without an RGB conversion, and the encoded buffer is
+handed to `rr.EncodedImage` as-is rather than copied with `.tobytes()`.
+
+libjpeg-turbo (PyTurboJPEG) is used when installed, and frames can be encoded
+in batches on a thread pool: both OpenCV and libjpeg-turbo release the GIL
+while encoding. While one batch encodes, the next is decoded into a second
+set of buffers.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+# Frames decoded ahead and encoded together per batch
+DEFAULT_BATCH = 8
+
+JPEG_BACKENDS = ("auto", "opencv", "turbojpeg")
+
+
+def make_jpeg_encoder(jpeg_quality: int, backend: str = "auto"):
+    """Return (backend name, encode(frame_bgr) -> JPEG buffer)."""
+    if backend in ("auto", "turbojpeg"):
+        try:
+            from turbojpeg import TurboJPEG, TJPF_BGR, TJSAMP_420
+
+            jpeg = TurboJPEG()
+
+            def encode(frame):
+                return jpeg.encode(frame, quality=jpeg_quality, pixel_format=TJPF_BGR,
+                                   jpeg_subsample=TJSAMP_420)
+
+            return "turbojpeg", encode
+        except Exception as e:  # package or shared library missing
+            if backend == "turbojpeg":
+                raise RuntimeError(f"libjpeg-turbo backend unavailable: {e}")
+
+    import cv2
+
+    params = [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality]
+
+    def encode(frame):
+        ok, buffer = cv2.imencode(".jpg", frame, params)
+        if not ok:
+            raise RuntimeError("JPEG encoding failed")
+        return buffer.reshape(-1)
+
+    return "opencv", encode
+
+
+def iter_encoded_frames(cap, jpeg_quality: int = 75, max_frames: int = None, backend: str = "auto",
+                        threads: int = 1, batch: int = DEFAULT_BATCH):
+    """Decode up to `max_frames` frames from an open VideoCapture and yield JPEG buffers in order."""
+    _, encode = make_jpeg_encoder(jpeg_quality, backend)
+    rings = [[None] * batch, [None] * batch]
+    remaining = [max_frames]
+
+    def decode(ring) -> int:
+        count = 0
+        limit = batch if remaining[0] is None else min(batch, remaining[0])
+        while count < limit:
+            ret, frame = cap.read(ring[count])
+            if not ret:
+                break
+            ring[count] = frame
+            count += 1
+        if remaining[0] is not None:
+            remaining[0] -= count
+        return count
+
+    pool = ThreadPoolExecutor(threads) if threads > 1 else None
+    try:
+        current = 0
+        count = decode(rings[current])
+        while count:
+            frames = rings[current][:count]
+            if pool is None:
+                for frame in frames:
+                    yield encode(frame)
+                current ^= 1
+                count = decode(rings[current])
+                continue
+            futures = [pool.submit(encode, frame) for frame in frames]
+            # Decode the next batch into the other buffers while this one encodes
+            current ^= 1
+            next_count = decode(rings[current])
+            for future in futures:
+                yield future.result()
+            count = next_count
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+
+def add_encode_args(parser):
+    """Add the frame encoder options to a converter CLI."""
+    parser.add_argument("--jpeg-backend", choices=JPEG_BACKENDS, default="auto",
+                        help="JPEG encoder: libjpeg-turbo when installed (auto), opencv or turbojpeg")
+    parser.add_argument("--encode-threads", type=int, default=1,
+                        help="Threads for batch JPEG encoding per video stream (default: 1)")
@@ -0,0 +1,657 @@
+"""
+Schema-driven stream handling for LeRobot v2.1 datasets.
+
+Streams are discovered from `info.json`:
+- `features` with dtype video/tactile/depth are camera streams, found on disk
+  through the `video_path` (or `mov_path`) templates
+- float features with per-joint `names` are scalar streams read from parquet
+
+`--include`/`--exclude` glob patterns on the feature keys pick which streams
+are converted; nothing else is opened or decoded.
+"""
+import sys
+import json
+import fnmatch
+import argparse
+from pathlib import Path
+from collections import namedtuple
+
+from convert_common import (
+    bound_seconds, scalar_rounder, DEFAULT_QUANTIZE_STEP, check_dependencies, add_window_args, add_precision_args,
+)
+from frame_encoder import iter_encoded_frames, add_encode_args
+from rrd_writer import Event, merge_streams, write_events, count_events, finish_recording, shift_events
+from memory_budget import budget_recording, add_memory_args, memory_budget
+from optimize_rrd import optimize_rrd, add_optimize_args
+from sharding import add_shard_args, select_shard, episode_items, run_items, ShardManifest
+
+# Features stored as video files next to the parquet data
+VIDEO_DTYPES = ("video", "tactile", "depth")
+SCALAR_DTYPES = ("float32", "float64")
+
+# Bookkeeping columns present in every LeRobot parquet file
+INDEX_COLUMNS = ("timestamp", "frame_index", "episode_index", "index", "task_index")
+
+DEFAULT_DATA_PATH = "data/chunk-{episode_chunk:03d}/episode_{episode_index:06d}.parquet"
+DEFAULT_VIDEO_PATH = "videos/chunk-{episode_chunk:03d}/{video_key}/episode_{episode_index:06d}.mp4"
+
+# What a converter script sets for its datasets (see main); the CLI is shared
+# description: argparse description
+# entity_names: feature key -> short entity path used by the gallery layout
+# default_include: --include patterns when none are given
+# thumbnail_stream: camera feature the --thumbnail frame is taken from
+# select_joints: (key, names) -> [(index, label)] of the joints to plot
+Preset = namedtuple("Preset", ["description", "entity_names", "default_include", "thumbnail_stream",
+                               "select_joints"])
+
+PACK_MODES = ("timeline", "recordings")
+# Seconds of empty timeline between episodes packed on one timeline
+PACK_GAP_S = 1.0
+
+
+def load_dataset_info(dataset_path: Path) -> dict:
+    """Load dataset metadata from info.json"""
+    info_path = dataset_path / "meta" / "info.json"
+    with open(info_path, "r") as f:
+        return json.load(f)
+
+
+def load_episodes(dataset_path: Path) -> list:
+    """Load episode info from episodes.jsonl"""
+    episodes_path = dataset_path / "meta" / "episodes.jsonl"
+    episodes = []
+    with open(episodes_path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                episodes.append(json.loads(line))
+    return episodes
+
+
+def parse_episode_spec(text: str):
+    """Parse --episode: `3`, `0-9,12` or `all`."""
+    if text.strip().lower() == "all":
+        return "all"
+    episodes = []
+    try:
+        for part in text.split(","):
+            first, _, last = part.partition("-")
+            episodes.extend(range(int(first), int(last or first) + 1))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid episodes: {text} (use 3, 0-9,12 or all)")
+    return episodes
+
+
+def resolve_episodes(dataset_path: Path, spec) -> list:
+    """Episode indices for a parsed --episode value."""
+    if spec == "all":
+        return [episode["episode_index"] for episode in load_episodes(dataset_path)]
+    return list(spec)
+
+
+def list_streams(info: dict) -> list:
+    """List the convertible streams declared in info.json features."""
+    streams = []
+    for key, feature in info.get("features", {}).items():
+        dtype = feature.get("dtype")
+        if dtype in VIDEO_DTYPES:
+            streams.append({"key": key, "kind": "video", "dtype": dtype})
+        elif dtype in SCALAR_DTYPES and key not in INDEX_COLUMNS:
+            shape = feature.get("shape") or [1]
+            names = feature.get("names") or [f"{i}" for i in range(shape[0])]
+            streams.append({"key": key, "kind": "scalar", "dtype": dtype, "names": list(names)})
+    return streams
+
+
+def select_streams(streams: list, include: list, exclude: list = ()) -> list:
+    """Filter streams by feature key with fnmatch-style include/exclude patterns."""
+    selected = []
+    for stream in streams:
+        key = stream["key"]
+        if not any(fnmatch.fnmatchcase(key, pattern) for pattern in include):
+            continue
+        if any(fnmatch.fnmatchcase(key, pattern) for pattern in exclude):
+            continue
+        selected.append(stream)
+    return selected
+
+
+def entity_path_for(key: str, entity_names: dict) -> str:
+    """Entity path of a stream: an explicit alias, else the feature key as a path."""
+    return entity_names.get(key, key.replace(".", "/"))
+
+
+def episode_chunk(info: dict, episode_idx: int) -> int:
+    return episode_idx // info.get("chunks_size", 1000)
+
+
+def parquet_file(dataset_path: Path, info: dict, episode_idx: int) -> Path:
+    """Path of an episode's parquet file from the `data_path` template."""
+    template = info.get("data_path", DEFAULT_DATA_PATH)
+    return dataset_path / template.format(episode_chunk=episode_chunk(info, episode_idx),
+                                          episode_index=episode_idx)
+
+
+def video_file(dataset_path: Path, info: dict, video_key: str, episode_idx: int) -> Path:
+    """Path of an episode's video for one feature.
+
+    Tries `video_path` then `mov_path` and returns the first that exists
+    (or the `video_path` candidate so the caller can report it missing).
+    """
+    templates = [t for t in (info.get("video_path", DEFAULT_VIDEO_PATH), info.get("mov_path")) if t]
+    candidates = [dataset_path / t.format(episode_chunk=episode_chunk(info, episode_idx),
+                                          video_key=video_key, episode_index=episode_idx)
+                  for t in templates]
+    for candidate in candidates:
+        if candidate.exists():
+            return candidate
+    return candidates[0]
+
+
+def parquet_columns(parquet_path: Path, columns: list, start_s: float = None, end_s: float = None,
+                    start_frame: int = None, end_frame: int = None) -> tuple:
+    """Columns to read and the window filters for a parquet file.
+
+    The window is [start_frame, end_frame) on `frame_index` when given, so the
+    rows match the video frames exactly; otherwise [start_s, end_s) on
+    `timestamp`, compared in the column's own dtype (float32 timestamps
+    rounded differently from the float64 bounds would shift the edges).
+    """
+    import numpy as np
+    import pyarrow.parquet as pq
+
+    schema = pq.read_schema(parquet_path)
+    schema_names = set(schema.names)
+    wanted = [c for c in ("timestamp", "frame_index", *columns) if c in schema_names]
+    filters = []
+    if "frame_index" in schema_names and (start_frame or end_frame is not None):
+        if start_frame:
+            filters.append(("frame_index", ">=", start_frame))
+        if end_frame is not None:
+            filters.append(("frame_index", "<", end_frame))
+    elif "timestamp" in schema_names:
+        as_column = np.dtype(schema.field("timestamp").type.to_pandas_dtype()).type
+        if start_s is not None:
+            filters.append(("timestamp", ">=", as_column(start_s)))
+        if end_s is not None:
+            filters.append(("timestamp", "<", as_column(end_s)))
+    return wanted, filters
+
+
+def columns_to_data(table, columns: list, wanted: list) -> dict:
+    """Convert a pyarrow Table or RecordBatch to the dict of arrays used by the loggers."""
+    import numpy as np
+
+    result = {
+        "timestamp": table.column("timestamp").to_numpy() if "timestamp" in wanted else None,
+        "frame_index": table.column("frame_index").to_numpy() if "frame_index" in wanted else None,
+    }
+    for column in columns:
+        if column in wanted:
+            # List<float> column -> (frames, dof) array
+            result[column] = np.stack(table.column(column).to_numpy(zero_copy_only=False)) \
+                if table.num_rows else np.empty((0, 0))
+    return result
+
+
+def load_parquet_data(parquet_path: Path, columns: list, start_s: float = None, end_s: float = None,
+                      start_frame: int = None, end_frame: int = None) -> dict:
+    """Load the timestamp/frame_index columns plus the requested feature columns.
+
+    The window (see parquet_columns) is pushed down as a filter, so row
+    groups whose statistics fall outside it are never read.
+    """
+    import pyarrow.parquet as pq
+
+    wanted, filters = parquet_columns(parquet_path, columns, start_s, end_s, start_frame, end_frame)
+    table = pq.read_table(parquet_path, columns=wanted, filters=filters or None)
+    return columns_to_data(table, columns, wanted)
+
+
+def iter_parquet_data(parquet_path: Path, columns: list, start_s: float = None, end_s: float = None,
+                      batch_rows: int = 4096, start_frame: int = None, end_frame: int = None):
+    """Like load_parquet_data, but yield the data in batches of at most `batch_rows` rows.
+
+    Only one record batch is read ahead, so memory stays bounded for
+    arbitrarily long episodes.
+    """
+    import pyarrow.dataset as ds
+
+    wanted, filters = parquet_columns(parquet_path, columns, start_s, end_s, start_frame, end_frame)
+    expression = None
+    for column, op, value in filters:
+        term = ds.field(column) >= value if op == ">=" else ds.field(column) < value
+        expression = term if expression is None else expression & term
+    dataset = ds.dataset(str(parquet_path), format="parquet")
+    for batch in dataset.to_batches(columns=wanted, filter=expression, batch_size=batch_rows,
+                                    batch_readahead=1, fragment_readahead=1):
+        if batch.num_rows:
+            yield columns_to_data(batch, columns, wanted)
+
+
+def send_scalar_columns(data: dict, key: str, entity_path: str, joints: list, fps: float,
+                        round_values=None, time_offset: float = 0.0, frame_offset: int = 0) -> int:
+    """Log every selected joint of a scalar feature as one column per joint.
+
+    `joints` is a list of (column index, display name) pairs and
+    `round_values` an optional convert_common.scalar_rounder. The offsets
+    shift the episode along both timelines. Returns the number of values logged.
+    """
+    import numpy as np
+    import rerun as rr
+
+    values = data.get(key)
+    if values is None or not len(values):
+        return 0
+
+    # Clipped reads start mid-episode, so frame numbers come from the data
+    frames = data["frame_index"] if data.get("frame_index") is not None else np.arange(len(values))
+    times = data["timestamp"] if data["timestamp"] is not None else frames / fps
+    indexes = [rr.TimeColumn("timestamp", timestamp=times + time_offset),
+               rr.TimeColumn("frame", sequence=frames + frame_offset)]
+
+    selected = values[:, [i for i, _ in joints]]
+    if round_values is not None:
+        selected = round_values(selected)
+    for column, (_, name) in enumerate(joints):
+        rr.send_columns(f"{entity_path}/{name}", indexes=indexes,
+                        columns=rr.Scalars.columns(scalars=selected[:, column]))
+    return selected.size
+
+
+def iter_video_frames(video_path: Path, entity_path: str, fps: float = 30.0, jpeg_quality: int = 75,
+                      start_frame: int = 0, end_frame: int = None, jpeg_backend: str = "auto",
+                      encode_threads: int = 1):
+    """Yield video frames [start_frame, end_frame) from MP4/MOV as JPEG-encoded image events.
+
+    A non-zero start seeks the decoder (to the keyframe before `start_frame`,
+    then decodes forward) instead of decoding from frame 0.
+    """
+    import rerun as rr
+    import cv2
+
+    if not video_path.exists():
+        print(f"  Warning: Video not found: {video_path}")
+        return
+
+    cap = cv2.VideoCapture(str(video_path))
+    if not cap.isOpened():
+        print(f"  Warning: Could not open video: {video_path}")
+        return
+
+    if start_frame > 0:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+
+    max_frames = end_frame - start_frame if end_frame is not None else None
+    frame_idx = start_frame
+    try:
+        # Encode as JPEG for compression (much smaller than raw)
+        for jpeg_data in iter_encoded_frames(cap, jpeg_quality, max_frames, jpeg_backend, encode_threads):
+            yield Event(frame_idx / fps, frame_idx, entity_path,
+                        rr.EncodedImage(contents=jpeg_data, media_type="image/jpeg"))
+
+            frame_idx += 1
+
+            if (frame_idx - start_frame) % 200 == 0:
+                print(f"    Logged {frame_idx} frames from {video_path.name}")
+    finally:
+        cap.release()
+
+
+def extract_thumbnail(video_path: Path, output_path: Path, frame_num: int = 30):
+    """Extract a single frame from video as thumbnail."""
+    import cv2
+
+    cap = cv2.VideoCapture(str(video_path))
+    if not cap.isOpened():
+        print(f"Warning: Could not open video for thumbnail: {video_path}")
+        return False
+
+    cap.set(cv2.CAP_PROP_POS_FRAMES, frame_num)
+    ret, frame = cap.read()
+    cap.release()
+
+    if ret:
+        cv2.imwrite(str(output_path), frame)
+        print(f"  Saved thumbnail: {output_path}")
+        return True
+    return False
+
+
+def all_joints(key: str, names: list) -> list:
+    """Default joint selection: every column, named as in info.json."""
+    return list(enumerate(names))
+
+
+def episode_length(dataset_path: Path, info: dict, episode_idx: int) -> int:
+    """Frames in an episode, from episodes.jsonl or else the parquet footer."""
+    for episode in load_episodes(dataset_path):
+        if episode.get("episode_index") == episode_idx and "length" in episode:
+            return int(episode["length"])
+    import pyarrow.parquet as pq
+
+    return pq.ParquetFile(parquet_file(dataset_path, info, episode_idx)).metadata.num_rows
+
+
+def clip_frames(start, end, fps: float) -> tuple:
+    """(start_s, end_s, start_frame, end_frame) of parsed --start/--end bounds.
+
+    Episode timestamps start at 0, so bounds map directly onto them; the
+    frame window is [start_frame, end_frame), with end_frame None for open.
+    """
+    import math
+
+    start_s = bound_seconds(start, fps)
+    end_s = bound_seconds(end, fps)
+    start_frame = math.ceil(start_s * fps - 1e-6) if start_s else 0
+    end_frame = math.ceil(end_s * fps - 1e-6) if end_s is not None else None
+    return start_s, end_s, start_frame, end_frame
+
+
+def clipped_length(length: int, start_frame: int, end_frame: int = None) -> int:
+    """Frames of a `length`-frame episode inside [start_frame, end_frame)."""
+    last = length if end_frame is None else min(end_frame, length)
+    return max(last - start_frame, 0)
+
+
+def log_episode(dataset_path: Path, episode_idx: int, info: dict, streams: list,
+                entity_names: dict = None, select_joints=all_joints, jpeg_quality: int = 75,
+                start=None, end=None, jpeg_backend: str = "auto", encode_threads: int = 1,
+                scalar_precision: str = "float64", quantize_step: float = DEFAULT_QUANTIZE_STEP,
+                budget=None, time_offset: float = 0.0, frame_offset: int = 0):
+    """Log the selected streams of one episode into the current recording.
+
+    `start`/`end` are parsed --start/--end bounds; the episode is clipped to
+    [start, end) with parquet filters and video seeking. Scalar streams are
+    sent as columns, rounded to `scalar_precision`. With a `budget`
+    (memory_budget.MemoryBudget) the parquet file is streamed in batches.
+    `time_offset`/`frame_offset` place the episode further along the timelines.
+    """
+    entity_names = entity_names or {}
+    parquet_path = parquet_file(dataset_path, info, episode_idx)
+    fps = info.get("fps", 30)
+    start_s, end_s, start_frame, end_frame = clip_frames(start, end, fps)
+
+    print(f"  Parquet: {parquet_path}")
+    print(f"  Streams: {', '.join(s['key'] for s in streams)}")
+    print(f"  JPEG quality: {jpeg_quality}")
+    if scalar_precision != "float64":
+        print(f"  Scalar precision: {scalar_precision}"
+              + (f" (step {quantize_step:g})" if scalar_precision == "quantize" else ""))
+    if start is not None or end is not None:
+        print(f"  Clip: frames {start_frame} to {end_frame if end_frame is not None else 'end'}")
+
+    # Scalar streams come from a single parquet read of just their columns and
+    # are sent column-wise; their chunks are already sorted by time
+    counts = {}
+    scalar_streams = [s for s in streams if s["kind"] == "scalar"]
+    if scalar_streams:
+        if parquet_path.exists():
+            print(f"  Loading parquet data...")
+            keys = [s["key"] for s in scalar_streams]
+            if budget is None:
+                batches = [load_parquet_data(parquet_path, keys, start_s, end_s, start_frame, end_frame)]
+            else:
+                row_bytes = 16 + 8 * sum(len(s["names"] or [None]) for s in scalar_streams)
+                batches = iter_parquet_data(parquet_path, keys, start_s, end_s, budget.batch_rows(row_bytes),
+                                            start_frame, end_frame)
+            round_values = scalar_rounder(scalar_precision, quantize_step)
+            for data in batches:
+                for stream in scalar_streams:
+                    joints = select_joints(stream["key"], stream["names"])
+                    entity_path = entity_path_for(stream["key"], entity_names)
+                    counts[stream["key"]] = counts.get(stream["key"], 0) + send_scalar_columns(
+                        data, stream["key"], entity_path, joints, fps, round_values, time_offset, frame_offset)
+                if budget is not None:
+                    budget.check()
+        else:
+            print(f"  Warning: Parquet not found: {parquet_path}")
+
+    sources = []
+    # Only the selected camera streams are opened and decoded
+    for stream in streams:
+        if stream["kind"] != "video":
+            continue
+        path = video_file(dataset_path, info, stream["key"], episode_idx)
+        entity_path = entity_path_for(stream["key"], entity_names)
+        events = iter_video_frames(path, entity_path, fps, jpeg_quality, start_frame, end_frame,
+                                   jpeg_backend, encode_threads)
+        if time_offset or frame_offset:
+            events = shift_events(events, time_offset, frame_offset)
+        sources.append((stream["key"], events))
+
+    # Camera streams are interleaved by timestamp so the recording is written in time order
+    print(f"  Writing {len(sources)} streams in time order...")
+    write_events(merge_streams([count_events(events, counts, key) for key, events in sources]), budget=budget)
+    # send_scalar_columns counts values (rows x selected joints), the cameras count frames
+    for stream in scalar_streams:
+        print(f"    {stream['key']}: {counts.get(stream['key'], 0)} values")
+    for key, _ in sources:
+        print(f"    {key}: {counts.get(key, 0)} frames")
+
+
+def convert_episode(dataset_path: Path, episode_idx: int, output_dir: Path, info: dict,
+                    streams: list, entity_names: dict = None, select_joints=all_joints,
+                    jpeg_quality: int = 75, start=None, end=None, jpeg_backend: str = "auto",
+                    encode_threads: int = 1, scalar_precision: str = "float64",
+                    quantize_step: float = DEFAULT_QUANTIZE_STEP, budget=None):
+    """Convert the selected streams of a single episode to its own RRD file (see log_episode)."""
+    import rerun as rr
+
+    name = f"{dataset_path.name}_episode_{episode_idx}"
+    output_path = output_dir / f"{name}.rrd"
+
+    print(f"\nConverting episode {episode_idx}")
+    print(f"  Output: {output_path}")
+
+    # Initialize Rerun
+    with budget_recording(budget):
+        rr.init(name, spawn=False)
+        rr.save(str(output_path))
+
+        log_episode(dataset_path, episode_idx, info, streams, entity_names, select_joints, jpeg_quality,
+                    start, end, jpeg_backend, encode_threads, scalar_precision, quantize_step, budget)
+        finish_recording()
+
+    print(f"\n  Conversion complete: {output_path}")
+    print(f"  File size: {output_path.stat().st_size / (1024*1024):.1f} MB")
+    if budget is not None:
+        budget.report()
+
+    return output_path
+
+
+def pack_episodes(dataset_path: Path, episode_indices: list, output_dir: Path, info: dict,
+                  streams: list, mode: str = "timeline", budget=None, **options) -> tuple:
+    """Convert several episodes into one RRD file, so the viewer loads them with one fetch.
+
+    - "timeline": one recording with the episodes laid end to end on the
+      timestamp and frame timelines, PACK_GAP_S apart, and an `episodes`
+      text log marking each start. With --start/--end each episode is
+      clipped and shifted so its first kept frame starts its slot.
+    - "recordings": one recording per episode (recording id = episode name)
+      under a shared application id, written separately and merged with
+      `rerun rrd merge`; the viewer switches between them without reloading.
+
+    An index `<dataset>_packed.json` next to the RRD lists where each episode
+    is. `options` are passed on to log_episode. Returns (rrd path, index path).
+    """
+    import rerun as rr
+    from optimize_rrd import rerun_cli
+
+    name = f"{dataset_path.name}_packed"
+    output_path = output_dir / f"{name}.rrd"
+    index_path = output_dir / f"{name}.json"
+    fps = info.get("fps", 30)
+    _, _, start_frame, end_frame = clip_frames(options.get("start"), options.get("end"), fps)
+    index = {"rrd": output_path.name, "mode": mode, "fps": fps, "episodes": []}
+
+    print(f"\nPacking {len(episode_indices)} episodes ({mode} mode)")
+    print(f"  Output: {output_path}")
+    with budget_recording(budget):
+        if mode == "timeline":
+            rr.init(name, spawn=False)
+            rr.save(str(output_path))
+            time_offset, frame_offset = 0.0, 0
+            for episode_idx in episode_indices:
+                length = clipped_length(episode_length(dataset_path, info, episode_idx), start_frame, end_frame)
+                print(f"\nEpisode {episode_idx}: {length} frames at {time_offset:.2f}s")
+                rr.set_time("timestamp", timestamp=time_offset)
+                rr.set_time("frame", sequence=frame_offset)
+                rr.log("episodes", rr.TextLog(f"Episode {episode_idx}"))
+                # Shift the clipped window so its first frame lands at the offsets
+                log_episode(dataset_path, episode_idx, info, streams, budget=budget,
+                            time_offset=time_offset - start_frame / fps, frame_offset=frame_offset - start_frame,
+                            **options)
+                index["episodes"].append({"episode": episode_idx, "start": time_offset,
+                                          "end": time_offset + length / fps,
+                                          "first_frame": frame_offset, "frames": length})
+                time_offset += length / fps + PACK_GAP_S
+                frame_offset += length
+            finish_recording()
+        else:
+            parts_dir = output_dir / f"{name}.parts"
+            parts_dir.mkdir(parents=True, exist_ok=True)
+            paths = []
+            try:
+                for episode_idx in episode_indices:
+                    recording_id = f"{dataset_path.name}_episode_{episode_idx}"
+                    print(f"\nEpisode {episode_idx}: recording {recording_id}")
+                    rr.init(name, spawn=False, recording_id=recording_id)
+                    paths.append(str(parts_dir / f"{recording_id}.rrd"))
+                    rr.save(paths[-1])
+                    log_episode(dataset_path, episode_idx, info, streams, budget=budget, **options)
+                    finish_recording()
+                    index["episodes"].append({"episode": episode_idx, "recording_id": recording_id,
+                                              "frames": clipped_length(episode_length(dataset_path, info, episode_idx),
+                                                                       start_frame, end_frame)})
+                result = rerun_cli("rrd", "merge", *paths, "-o", str(output_path))
+                if result.returncode != 0:
+                    raise RuntimeError(f"rerun rrd merge failed: {result.stderr.strip().splitlines()[-1:]}")
+            finally:
+                for path in paths:
+                    Path(path).unlink(missing_ok=True)
+                parts_dir.rmdir()
+
+    with open(index_path, "w") as f:
+        json.dump(index, f, indent=2)
+
+    print(f"\n  Packed {len(episode_indices)} episodes: {output_path}")
+    print(f"  File size: {output_path.stat().st_size / (1024*1024):.1f} MB")
+    if budget is not None:
+        budget.report()
+
+    return output_path, index_path
+
+
+def add_stream_args(parser, default_include: list):
+    """Add the --include/--exclude/--list-streams selectors to a converter CLI."""
+    parser.add_argument("--include", type=str, nargs="+", default=default_include,
+                        help=f"Feature keys to convert, glob patterns (default: {' '.join(default_include)})")
+    parser.add_argument("--exclude", type=str, nargs="+", default=[],
+                        help="Feature keys to skip, glob patterns")
+    parser.add_argument("--list-streams", action="store_true",
+                        help="List the streams declared in info.json and exit")
+
+
+def add_pack_args(parser):
+    """Add the --pack output mode to a converter CLI."""
+    parser.add_argument("--pack", choices=PACK_MODES, default=None,
+                        help="Write all selected episodes into one RRD: end to end on one timeline, "
+                             "or as one recording each (default: one RRD per episode)")
+
+
+def print_streams(streams: list, selected: list):
+    """Print available streams, marking the ones selected for conversion."""
+    selected_keys = {s["key"] for s in selected}
+    for stream in streams:
+        mark = "*" if stream["key"] in selected_keys else " "
+        detail = stream["dtype"] if stream["kind"] == "video" else f"{len(stream['names'])} values"
+        print(f"  {mark} {stream['key']} ({stream['kind']}, {detail})")
+
+
+def main(argv, preset: Preset):
+    """Command line shared by the LeRobot converter scripts, configured by their `preset`."""
+    parser = argparse.ArgumentParser(description=preset.description)
+    parser.add_argument("dataset_path", type=str, help="Path to LeRobot dataset directory")
+    parser.add_argument("--episode", type=parse_episode_spec, default=[0],
+                        help="Episodes to convert: 3, 0-9,12 or all (default: 0)")
+    parser.add_argument("--output-dir", type=str, default="public/rrd", help="Output directory for RRD files")
+    parser.add_argument("--thumbnail", action="store_true", help="Also extract thumbnail image")
+    parser.add_argument("--jpeg-quality", type=int, default=75, help="JPEG quality 1-100 (default: 75)")
+    add_stream_args(parser, preset.default_include)
+    add_encode_args(parser)
+    add_precision_args(parser)
+    add_memory_args(parser)
+    add_window_args(parser)
+    add_optimize_args(parser)
+    add_shard_args(parser)
+    add_pack_args(parser)
+    args = parser.parse_args(argv)
+    if args.pack and args.shard:
+        parser.error("--pack writes one file and cannot be combined with --shard")
+    check_dependencies("rerun", "pyarrow", "cv2")
+    
+    dataset_path = Path(args.dataset_path).resolve()
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    
+    print(f"Dataset: {dataset_path}")
+    
+    # Load metadata
+    info = load_dataset_info(dataset_path)
+    
+    print(f"Robot: {info.get('robot_type', 'unknown')}")
+    print(f"Total episodes: {info.get('total_episodes', 'N/A')}")
+    print(f"Total frames: {info.get('total_frames', 'N/A')}")
+    print(f"FPS: {info.get('fps', 30)}")
+    
+    streams = list_streams(info)
+    selected = select_streams(streams, args.include, args.exclude)
+    if args.list_streams:
+        print_streams(streams, selected)
+        return
+    
+    # Same for every episode, packed or not
+    options = dict(entity_names=preset.entity_names, select_joints=preset.select_joints,
+                   jpeg_quality=args.jpeg_quality, start=args.start, end=args.end,
+                   jpeg_backend=args.jpeg_backend, encode_threads=args.encode_threads,
+                   scalar_precision=args.scalar_precision, quantize_step=args.quantize_step)
+    
+    def thumbnail(episode_idx: int, name: str) -> Path:
+        video_path = video_file(dataset_path, info, preset.thumbnail_stream, episode_idx)
+        thumb_path = Path("public/thumbnails") / f"{name}.jpg"
+        thumb_path.parent.mkdir(parents=True, exist_ok=True)
+        extract_thumbnail(video_path, thumb_path)
+        return thumb_path
+    
+    # Convert the selected episodes (or this machine's shard of them)
+    episode_indices = resolve_episodes(dataset_path, args.episode)
+    items = select_shard(episode_items(dataset_path, episode_indices, args.shard), args.shard)
+    
+    if args.pack:
+        # All episodes in one RRD plus an index of where each one is
+        rrd_path, index_path = pack_episodes(dataset_path, episode_indices, output_dir, info, selected, args.pack,
+                                             budget=memory_budget(args.memory_budget), **options)
+        if args.optimize:
+            optimize_rrd(rrd_path, args.max_rows, args.max_bytes)
+        if args.thumbnail:
+            thumbnail(episode_indices[0], rrd_path.stem)
+        return
+    
+    def convert(item):
+        rrd_path = convert_episode(dataset_path, item["episode"], output_dir, info, selected,
+                                   budget=memory_budget(args.memory_budget), **options)
+        outputs = [rrd_path]
+        if args.optimize:
+            optimize_rrd(rrd_path, args.max_rows, args.max_bytes)
+        
+        # Extract thumbnail if requested
+        if args.thumbnail:
+            outputs.append(thumbnail(item["episode"], item["id"]))
+        return outputs
+    
+    failed = run_items(items, ShardManifest(output_dir, args.shard, "rrd"), convert)
+    print(f"\nDone! {len(items) - len(failed)}/{len(items)} episodes converted to {output_dir}")
+    if failed:
+        sys.exit(1)
@@ -0,0 +1,116 @@
+"""
+Memory-bounded streaming for the converters.
+
+With `--memory-budget`, a conversion runs in a fixed footprint:
+- readers stream their inputs in batches sized from the budget (parquet
+  record batches, CSV chunks) instead of loading whole episodes or sessions;
+- Rerun's chunk batcher flushes at a bounded buffered size;
+- the writer checks the process RSS as it logs and, above the soft limit,
+  blocks on a flush of the recording. The readers are generators pulled by
+  the writer, so while it waits nothing new is read: backpressure.
+The peak RSS (high-water mark) is reported at the end.
+"""
+import os
+import gc
+import sys
+import resource
+from contextlib import contextmanager, nullcontext
+
+from optimize_rrd import parse_size
+
+# Flush once RSS passes this fraction of the budget
+SOFT_LIMIT = 0.8
+# Writer events between RSS checks
+CHECK_EVERY = 32
+# Read by Rerun whenever rr.save opens a file sink
+FLUSH_BYTES_ENV = "RERUN_FLUSH_NUM_BYTES"
+
+
+def current_rss() -> int:
+    """Resident set size of this process in bytes."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return peak_rss()
+
+
+def peak_rss() -> int:
+    """High-water mark of the resident set size in bytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class MemoryBudget:
+    """RSS budget shared by the readers and the writer of one conversion."""
+
+    def __init__(self, limit_bytes: int):
+        self.limit = limit_bytes
+        # Rerun buffers at most this much before writing a chunk to the sink
+        self.flush_bytes = max(1024 * 1024, limit_bytes // 16)
+        self.flushes = 0
+        self.over_budget = False
+        self.events = 0
+
+    @contextmanager
+    def recording(self):
+        """Bound Rerun's batcher for the recordings written inside the block.
+
+        The setting is process-wide, so it is put back on exit; later jobs in
+        the same worker process keep Rerun's default.
+        """
+        previous = os.environ.get(FLUSH_BYTES_ENV)
+        os.environ[FLUSH_BYTES_ENV] = str(self.flush_bytes)
+        try:
+            yield self
+        finally:
+            if previous is None:
+                os.environ.pop(FLUSH_BYTES_ENV, None)
+            else:
+                os.environ[FLUSH_BYTES_ENV] = previous
+
+    def batch_rows(self, row_bytes: int) -> int:
+        """Rows per reader batch so that one batch uses ~1/64 of the budget."""
+        return int(min(max(self.limit // 64 // max(row_bytes, 1), 256), 1 << 20))
+
+    def check(self):
+        """Block on a recording flush if RSS is above the soft limit."""
+        if current_rss() < self.limit * SOFT_LIMIT:
+            return
+        import rerun as rr
+
+        rr.get_global_data_recording().flush()
+        gc.collect()
+        self.flushes += 1
+        if current_rss() > self.limit and not self.over_budget:
+            # Nothing more to release: the working set itself is too large
+            self.over_budget = True
+            print(f"  Warning: RSS {current_rss() / (1024*1024):.0f} MiB exceeds the "
+                  f"{self.limit / (1024*1024):.0f} MiB memory budget after flushing")
+
+    def tick(self):
+        """Count one written event, checking RSS every CHECK_EVERY events."""
+        self.events += 1
+        if self.events % CHECK_EVERY == 0:
+            self.check()
+
+    def report(self):
+        print(f"  Memory: peak RSS {peak_rss() / (1024*1024):.0f} MiB "
+              f"(budget {self.limit / (1024*1024):.0f} MiB), {self.flushes} backpressure flushes")
+
+
+def add_memory_args(parser):
+    """Add the --memory-budget streaming option to a converter CLI."""
+    parser.add_argument("--memory-budget", type=parse_size, default=None,
+                        help="Stream inputs and cap memory at this size, e.g. 2GiB (default: unbounded)")
+
+
+def memory_budget(limit_bytes):
+    """A MemoryBudget for a --memory-budget value, or None when unbounded."""
+    return MemoryBudget(limit_bytes) if limit_bytes else None
+
+
+def budget_recording(budget):
+    """`budget.recording()`, or a context that changes nothing without a budget."""
+    return budget.recording() if budget is not None else nullcontext()
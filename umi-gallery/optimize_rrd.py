@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Rewrite converted RRD files into well-sized, time-sorted chunks.
+
+Per-frame `Scalars` and single-point logs leave thousands of tiny chunks that
+the web viewer has to index on load. This runs Rerun's own compaction
+(`rerun rrd optimize`, or `rerun rrd compact` on older SDKs) with row and
+byte thresholds, replaces the file in place and reports the chunk count and a
+rough load-time estimate before and after.
+
+The converters call this automatically unless --no-optimize is given.
+
+Usage:
+    python optimize_rrd.py public/rrd/clean_bowl.rrd
+    python optimize_rrd.py public/rrd --max-rows 4096 --max-bytes 4MiB
+"""
+import os
+import re
+import sys
+import argparse
+import subprocess
+from pathlib import Path
+
+DEFAULT_MAX_ROWS = 4096
+DEFAULT_MAX_BYTES = 4 * 1024 * 1024
+
+# Load-time model for the web viewer: a fixed indexing cost per chunk plus
+# download/decode throughput. Only meant for before/after comparison.
+CHUNK_OVERHEAD_S = 0.2e-3
+LOAD_BYTES_PER_S = 50 * 1024 * 1024
+
+SIZE_UNITS = {
+    "": 1, "b": 1, "kb": 1000, "mb": 1000 ** 2, "gb": 1000 ** 3,
+    "kib": 1024, "mib": 1024 ** 2, "gib": 1024 ** 3,
+}
+
+
+def parse_size(text: str) -> int:
+    """Parse a byte size such as `4194304`, `512KiB` or `4MiB`."""
+    match = re.fullmatch(r"\s*([\d.]+)\s*([a-zA-Z]*)\s*", str(text))
+    if not match or match.group(2).lower() not in SIZE_UNITS:
+        raise argparse.ArgumentTypeError(f"invalid size: {text}")
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2).lower()])
+
+
+def rerun_cli(*args) -> subprocess.CompletedProcess:
+    """Run the `rerun` CLI bundled with rerun-sdk."""
+    env = dict(os.environ, RERUN_ANALYTICS="0")
+    return subprocess.run([sys.executable, "-m", "rerun", *args],
+                          capture_output=True, text=True, env=env)
+
+
+def rrd_stats(rrd_path: Path) -> dict:
+    """Chunk count and size of an RRD, read at the transport level (no decoding)."""
+    result = rerun_cli("rrd", "stats", "--no-decode", str(rrd_path))
+    match = re.search(r"num_chunks\s*=\s*(\d+)", result.stdout)
+    chunks = int(match.group(1)) if match else None
+    size = rrd_path.stat().st_size
+    return {
+        "chunks": chunks,
+        "bytes": size,
+        "load_s": estimate_load_time(chunks or 0, size),
+    }
+
+
+def estimate_load_time(chunks: int, size: int) -> float:
+    """Rough viewer load time in seconds for a recording."""
+    return chunks * CHUNK_OVERHEAD_S + size / LOAD_BYTES_PER_S
+
+
+def compact(rrd_path: Path, output_path: Path, max_rows: int, max_bytes: int):
+    """Compact `rrd_path` into `output_path` with the given chunk thresholds."""
+    result = rerun_cli("rrd", "optimize", str(rrd_path), "-o", str(output_path),
+                       "--max-rows", str(max_rows), "--max-size", f"{max_bytes}B")
+    if result.returncode != 0 and "unrecognized subcommand" in result.stderr:
+        # rerun-sdk < 0.30 only has `rrd compact`
+        result = rerun_cli("rrd", "compact", str(rrd_path), "-o", str(output_path),
+                           "--max-rows", str(max_rows), "--max-bytes", str(max_bytes))
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "rerun rrd failed")
+
+
+def optimize_rrd(rrd_path, max_rows: int = DEFAULT_MAX_ROWS, max_bytes: int = DEFAULT_MAX_BYTES) -> dict:
+    """Compact an RRD file in place and return its before/after stats."""
+    rrd_path = Path(rrd_path)
+    tmp_path = rrd_path.with_name(rrd_path.name + ".optimizing")
+
+    before = rrd_stats(rrd_path)
+    try:
+        compact(rrd_path, tmp_path, max_rows, max_bytes)
+        os.replace(tmp_path, rrd_path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    after = rrd_stats(rrd_path)
+
+    print(f"  Optimized {rrd_path.name}: "
+          f"{before['chunks']} -> {after['chunks']} chunks, "
+          f"{before['bytes'] / (1024*1024):.1f} -> {after['bytes'] / (1024*1024):.1f} MB, "
+          f"est. load {before['load_s']:.2f}s -> {after['load_s']:.2f}s")
+    return {"before": before, "after": after}
+
+
+def add_optimize_args(parser):
+    """Add the post-conversion optimize options to a converter CLI."""
+    parser.add_argument("--no-optimize", dest="optimize", action="store_false",
+                        help="Skip compacting the output into well-sized chunks")
+    parser.add_argument("--max-rows", type=int, default=DEFAULT_MAX_ROWS,
+                        help=f"Max rows per chunk when optimizing (default: {DEFAULT_MAX_ROWS})")
+    parser.add_argument("--max-bytes", type=parse_size, default=DEFAULT_MAX_BYTES,
+                        help="Max bytes per chunk when optimizing, e.g. 4MiB (default: 4MiB)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compact RRD files into well-sized, sorted chunks")
+    parser.add_argument("paths", type=Path, nargs="+", help="RRD files or directories of RRD files")
+    parser.add_argument("--max-rows", type=int, default=DEFAULT_MAX_ROWS,
+                        help=f"Max rows per chunk (default: {DEFAULT_MAX_ROWS})")
+    parser.add_argument("--max-bytes", type=parse_size, default=DEFAULT_MAX_BYTES,
+                        help="Max bytes per chunk, e.g. 4MiB (default: 4MiB)")
+    args = parser.parse_args(argv)
+
+    rrd_files = []
+    for path in args.paths:
+        rrd_files.extend(sorted(path.glob("*.rrd")) if path.is_dir() else [path])
+    print(f"Found {len(rrd_files)} RRD files to optimize\n")
+
+    for rrd_file in rrd_files:
+        try:
+            optimize_rrd(rrd_file, args.max_rows, args.max_bytes)
+        except Exception as e:
+            print(f"ERROR optimizing {rrd_file}: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Time-ordered writer stage shared by the converters.
+
+Each source stream (parquet scalars, a camera, a trajectory) is a generator of
+`Event`s that is sorted, or nearly sorted, by time. `merge_streams` merges
+them with a heap-based k-way merge, so the recording is written in time order
+and Rerun does not have to re-sort and compact out-of-order chunks on load.
+Small disorder within a stream is absorbed by a bounded lookahead buffer.
+"""
+import heapq
+from collections import namedtuple
+
+# time: seconds on the "timestamp" timeline
+# frame: index on the "frame" timeline, or None for streams without one
+Event = namedtuple("Event", ["time", "frame", "entity_path", "archetype"])
+
+# Events held per stream to reorder slightly out-of-order input
+DEFAULT_LOOKAHEAD = 32
+
+
+def reorder(events, lookahead: int):
+    """Sort a nearly sorted event stream using a bounded buffer.
+
+    Events displaced by more than `lookahead` positions are emitted as they
+    come; ties keep their input order.
+    """
+    buffer = []
+    for seq, event in enumerate(events):
+        heapq.heappush(buffer, (event.time, seq, event))
+        if len(buffer) > lookahead:
+            yield heapq.heappop(buffer)[2]
+    while buffer:
+        yield heapq.heappop(buffer)[2]
+
+
+def merge_streams(streams: list, lookahead: int = DEFAULT_LOOKAHEAD):
+    """k-way merge of per-stream event iterators by timestamp.
+
+    Only the head of each stream (plus its lookahead buffer) is held in
+    memory, so video frames are still decoded and encoded one at a time.
+    """
+    if lookahead > 0:
+        streams = [reorder(stream, lookahead) for stream in streams]
+    return heapq.merge(*streams, key=lambda event: event.time)
+
+
+class ScalarColumns:
+    """A time-sorted scalar series logged with `rr.send_columns` instead of per-row events.
+
+    `write_events` sends the rows before each checkpoint position just before
+    it cuts the segment, so every segment gets its own slice of the column.
+    """
+
+    def __init__(self, entity_path: str, times, values):
+        self.entity_path = entity_path
+        self.times = times
+        self.values = values
+        self.sent = 0
+
+    def __len__(self):
+        return len(self.times)
+
+    def send_until(self, end_time=None, budget=None):
+        """Send the rows not sent yet whose time is before `end_time` (all of them if None)."""
+        import numpy as np
+        import rerun as rr
+
+        end = len(self.times) if end_time is None else int(np.searchsorted(self.times, end_time, side="left"))
+        step = budget.batch_rows(16) if budget is not None else max(end - self.sent, 1)
+        for i in range(self.sent, end, step):
+            j = min(i + step, end)
+            rr.send_columns(self.entity_path,
+                            indexes=[rr.TimeColumn("timestamp", timestamp=self.times[i:j])],
+                            columns=rr.Scalars.columns(scalars=self.values[i:j]))
+            if budget is not None:
+                budget.check()
+        self.sent = max(self.sent, end)
+
+
+def write_events(events, segments=None, budget=None, columns=()) -> int:
+    """Log events to the current recording and return how many were written.
+
+    With `segments` (a checkpoint.Segments), the output is checkpointed
+    between events whenever a checkpoint is due, never between two events
+    that share a timestamp. With `budget` (a memory_budget.MemoryBudget),
+    the writer blocks on flushes while memory is over the soft limit.
+    `columns` are ScalarColumns sent in one slice per segment.
+    """
+    import rerun as rr
+
+    count = 0
+    last_time = None
+    for event in events:
+        if segments is not None and last_time is not None and event.time > last_time and segments.due():
+            for series in columns:
+                series.send_until(event.time, budget)
+            segments.cut(event.time)
+        last_time = event.time
+        rr.reset_time()
+        rr.set_time("timestamp", timestamp=event.time)
+        if event.frame is not None:
+            rr.set_time("frame", sequence=event.frame)
+        rr.log(event.entity_path, event.archetype)
+        count += 1
+        if budget is not None:
+            budget.tick()
+    for series in columns:
+        series.send_until(None, budget)
+    return count
+
+
+def shift_events(events, time_offset: float = 0.0, frame_offset: int = 0):
+    """Move an event stream later on both timelines, e.g. to lay episodes end to end."""
+    for event in events:
+        yield event._replace(time=event.time + time_offset,
+                             frame=event.frame + frame_offset if event.frame is not None else None)
+
+
+def finish_recording():
+    """Flush pending data and close the output file so it can be read back."""
+    import rerun as rr
+
+    rr.disconnect()
+
+
+def count_events(events, counts: dict, key: str):
+    """Pass events through while counting them under `key` in `counts`."""
+    for event in events:
+        counts[key] = counts.get(key, 0) + 1
+        yield event
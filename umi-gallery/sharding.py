@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Deterministic sharding of batch conversions across machines.
+
+Every node lists the same inputs, weighs them by size from metadata only
+(MCAP summary, parquet footers and video file sizes) and assigns them to
+shards with a greedy largest-first split. Each node therefore computes the
+same balanced partition without a coordinator. `--shard i/N` selects shard i
+(0-based) of N.
+
+Each sharded run writes `manifest.shard-<i>-of-<N>.json` next to its outputs.
+Once all nodes are done (and their outputs are copied together), `merge`
+combines the partial manifests and reports missing shards or failed items:
+
+    python convert_mcap_to_rrd.py source-data/mcap public/rrd --shard 0/4
+    python sharding.py merge public/rrd
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+
+def parse_shard(text: str) -> tuple:
+    """Parse `i/N` into (i, N) with 0 <= i < N."""
+    try:
+        index, count = (int(part) for part in text.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid shard: {text} (use i/N, e.g. 0/4)")
+    if count < 1 or not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"invalid shard: {text} (need 0 <= i < N)")
+    return (index, count)
+
+
+def add_shard_args(parser):
+    """Add the --shard option to a batch CLI."""
+    parser.add_argument("--shard", type=parse_shard, default=None,
+                        help="Only process shard i of N (0-based, e.g. 0/4), balanced by input size")
+
+
+def assign_shards(items: list, count: int) -> list:
+    """Split items ({"id", "size", ...}) into `count` shards of similar total size.
+
+    Largest first, each onto the currently lightest shard; ties are broken by
+    id and shard number, so the result only depends on the items themselves.
+    """
+    shards = [[] for _ in range(count)]
+    loads = [0] * count
+    for item in sorted(items, key=lambda item: (-item["size"], item["id"])):
+        target = min(range(count), key=lambda i: (loads[i], i))
+        shards[target].append(item)
+        # Empty inputs still cost a little, so they are spread out too
+        loads[target] += max(item["size"], 1)
+    return [sorted(shard, key=lambda item: item["id"]) for shard in shards]
+
+
+def select_shard(items: list, shard) -> list:
+    """The items of shard (i, N), or all items if `shard` is None."""
+    if shard is None:
+        return items
+    index, count = shard
+    selected = assign_shards(items, count)[index]
+    total = sum(item["size"] for item in items)
+    print(f"Shard {index}/{count}: {len(selected)} of {len(items)} items, "
+          f"{sum(item['size'] for item in selected) / (1024*1024):.1f} of {total / (1024*1024):.1f} MB")
+    return selected
+
+
+def mcap_items(mcap_files: list) -> list:
+    """Shard items for MCAP files, weighed by uncompressed chunk bytes from the summary."""
+    from mcap.reader import make_reader
+
+    items = []
+    for mcap_file in sorted(mcap_files):
+        size = mcap_file.stat().st_size
+        try:
+            with open(mcap_file, "rb") as f:
+                summary = make_reader(f).get_summary()
+            if summary is not None and summary.chunk_indexes:
+                size = sum(index.uncompressed_size for index in summary.chunk_indexes)
+        except Exception:
+            pass  # unindexed or damaged file: fall back to its file size
+        items.append({"id": mcap_file.stem, "source": str(mcap_file), "size": size})
+    return items
+
+
+def episode_items(dataset_path: Path, episodes: list, shard=None) -> list:
+    """Items for LeRobot episodes, weighed by parquet + video bytes when sharding."""
+    from build_catalog import scan_lerobot
+
+    if shard is None:
+        # Nothing to balance, so skip the metadata scan
+        return [{"id": f"{dataset_path.name}_episode_{episode}", "source": str(dataset_path),
+                 "episode": episode, "size": 0} for episode in episodes]
+    wanted = set(episodes)
+    return [{"id": entry["id"], "source": str(dataset_path), "episode": entry["episode"], "size": entry["size"]}
+            for entry in scan_lerobot(dataset_path) if entry["episode"] in wanted]
+
+
+def manifest_name(shard) -> str:
+    index, count = shard
+    return f"manifest.shard-{index}-of-{count}.json"
+
+
+class ShardManifest:
+    """Partial manifest of one shard's results, rewritten after every item."""
+
+    def __init__(self, output_dir: Path, shard, kind: str):
+        self.path = Path(output_dir) / manifest_name(shard) if shard is not None else None
+        self.data = {"kind": kind, "shard": list(shard) if shard else None, "items": []}
+
+    def record(self, item: dict, outputs: list, ok: bool, elapsed: float, error: str = None):
+        entry = {key: item[key] for key in ("id", "source", "episode", "size") if key in item}
+        entry.update({"outputs": [str(Path(path).name) for path in outputs], "ok": ok,
+                      "elapsed": round(elapsed, 3)})
+        if error:
+            entry["error"] = error
+        self.data["items"].append(entry)
+        self.write()
+
+    def write(self):
+        if self.path is None:
+            return
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self.data, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def run_items(items: list, manifest: ShardManifest, func):
+    """Run `func(item) -> list of outputs` per item, recording results; returns failed ids."""
+    failed = []
+    for item in items:
+        start = time.monotonic()
+        try:
+            outputs = func(item) or []
+            manifest.record(item, outputs, True, time.monotonic() - start)
+        except Exception as e:
+            print(f"ERROR processing {item['id']}: {e}")
+            manifest.record(item, [], False, time.monotonic() - start, str(e))
+            failed.append(item["id"])
+    return failed
+
+
+def merge_manifests(directory: Path) -> dict:
+    """Combine the partial shard manifests in a directory into one manifest."""
+    partials = sorted(directory.glob("manifest.shard-*-of-*.json"))
+    if not partials:
+        raise FileNotFoundError(f"No shard manifests in {directory}")
+
+    manifests = []
+    for path in partials:
+        with open(path, "r") as f:
+            manifests.append(json.load(f))
+    counts = {manifest["shard"][1] for manifest in manifests}
+    if len(counts) != 1:
+        raise ValueError(f"Manifests from different shard counts: {sorted(counts)}")
+    count = counts.pop()
+
+    present = {manifest["shard"][0] for manifest in manifests}
+    items = sorted((item for manifest in manifests for item in manifest["items"]),
+                   key=lambda item: item["id"])
+    return {
+        "kind": manifests[0]["kind"],
+        "shards": count,
+        "missing_shards": [i for i in range(count) if i not in present],
+        "items": items,
+        "failed": [item["id"] for item in items if not item["ok"]],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Combine the partial manifests of a sharded batch run")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    merge = subparsers.add_parser("merge", help="Merge manifest.shard-*-of-N.json into manifest.json")
+    merge.add_argument("directory", type=Path, help="Output directory holding the shard manifests")
+    args = parser.parse_args()
+
+    merged = merge_manifests(args.directory)
+    output_path = args.directory / "manifest.json"
+    with open(output_path, "w") as f:
+        json.dump(merged, f, indent=2)
+
+    print(f"Merged {merged['shards'] - len(merged['missing_shards'])}/{merged['shards']} shards, "
+          f"{len(merged['items'])} items into {output_path}")
+    if merged["missing_shards"]:
+        print(f"Missing shards: {', '.join(map(str, merged['missing_shards']))}")
+    if merged["failed"]:
+        print(f"Failed items: {', '.join(merged['failed'])}")
+    if merged["missing_shards"] or merged["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,9 @@
+import { formatDuration, formatSize } from '../data/catalog';
+
 /**
  * DatasetCard - Individual card component for the gallery grid
  */
-export default function DatasetCard({ dataset, isActive, onClick }) {
+export default function DatasetCard({ dataset, stats, isActive, onClick }) {
   return (
     <button
       onClick={onClick}
@@ -77,6 +79,16 @@ export default function DatasetCard({ dataset, isActive, onClick }) {
             </span>
           )}
         </div>
+
+        {/* Catalog stats */}
+        {stats && (
+          <div className="mt-2 flex flex-wrap gap-3 text-xs text-slate-400">
+            {formatDuration(stats.duration) && <span>{formatDuration(stats.duration)}</span>}
+            {stats.frames > 0 && <span>{stats.frames} frames</span>}
+            {stats.cameras?.length > 0 && <span>{stats.cameras.length} cameras</span>}
+            {formatSize(stats.size) && <span>{formatSize(stats.size)}</span>}
+          </div>
+        )}
       </div>
     </button>
   );
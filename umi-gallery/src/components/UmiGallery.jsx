@@ -1,13 +1,20 @@
-import { useState, useRef } from 'react';
+import { useState, useRef, useEffect } from 'react';
 import { DATASETS, DATA_SOURCE } from '../data/datasets';
+import { loadCatalog, catalogEntryFor } from '../data/catalog';
 import RerunViewer from './RerunViewer';
 import DatasetCard from './DatasetCard';
 
 export default function UmiGallery() {
   // Start with no dataset selected - user must click to activate
   const [selectedDataset, setSelectedDataset] = useState(null);
+  const [catalog, setCatalog] = useState({});
   const viewerRef = useRef(null);
 
+  // Source metadata (duration, frames, size) is optional - cards render without it
+  useEffect(() => {
+    loadCatalog().then(setCatalog);
+  }, []);
+
   const handleCardClick = (dataset) => {
     setSelectedDataset(dataset);
     // Smooth scroll to viewer after selection
@@ -53,6 +60,7 @@ export default function UmiGallery() {
               <DatasetCard
                 key={dataset.id}
                 dataset={dataset}
+                stats={catalogEntryFor(catalog, dataset)}
                 isActive={selectedDataset?.id === dataset.id}
                 onClick={() => handleCardClick(dataset)}
               />
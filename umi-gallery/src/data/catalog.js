@@ -0,0 +1,41 @@
+// Catalog Loader
+// catalog.json is generated by build_catalog.py from source metadata only
+// (MCAP summaries, LeRobot meta/parquet footers, Lumos timestamps.csv).
+
+const CATALOG_URL = './catalog.json';
+
+/**
+ * Fetch the catalog and return its entries keyed by id.
+ * Resolves to an empty object if the catalog has not been built.
+ */
+export async function loadCatalog() {
+  try {
+    const response = await fetch(CATALOG_URL);
+    if (!response.ok) return {};
+    const catalog = await response.json();
+    return catalog.datasets ?? {};
+  } catch {
+    return {};
+  }
+}
+
+/**
+ * Look up the catalog entry of a dataset by the file name of its RRD.
+ */
+export function catalogEntryFor(catalog, dataset) {
+  const fileName = dataset.rrdUrl?.split('/').pop() ?? '';
+  return catalog[fileName.replace(/\.rrd$/, '')] ?? null;
+}
+
+export function formatDuration(seconds) {
+  if (seconds == null) return null;
+  const minutes = Math.floor(seconds / 60);
+  const rest = Math.round(seconds % 60);
+  return minutes > 0 ? `${minutes}m ${rest}s` : `${rest}s`;
+}
+
+export function formatSize(bytes) {
+  if (!bytes) return null;
+  const mb = bytes / (1024 * 1024);
+  return mb >= 1024 ? `${(mb / 1024).toFixed(1)} GB` : `${mb.toFixed(0)} MB`;
+}
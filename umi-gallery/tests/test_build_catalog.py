@@ -0,0 +1,30 @@
+import json
+
+import pytest
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+from build_catalog import scan_lerobot
+
+
+def test_unreadable_episode_keeps_the_dataset(tmp_path):
+    import pyarrow as pa
+
+    (tmp_path / "meta").mkdir()
+    (tmp_path / "meta" / "info.json").write_text(json.dumps({"fps": 10, "features": {}}))
+    (tmp_path / "meta" / "episodes.jsonl").write_text(
+        "".join(json.dumps({"episode_index": i, "length": 5}) + "\n" for i in range(2)))
+    data_dir = tmp_path / "data" / "chunk-000"
+    data_dir.mkdir(parents=True)
+    pq.write_table(pa.table({"frame_index": list(range(5))}), data_dir / "episode_000000.parquet")
+    # What a checkout without `git lfs pull` leaves behind
+    (data_dir / "episode_000001.parquet").write_text(
+        "version https://git-lfs.github.com/spec/v1\noid sha256:0\nsize 1024\n")
+
+    entries = scan_lerobot(tmp_path)
+
+    assert [entry["episode"] for entry in entries] == [0, 1]
+    assert entries[0]["rows"] == 5 and "error" not in entries[0]
+    assert entries[1]["rows"] is None
+    assert entries[1]["frames"] == 5
+    assert "unreadable parquet" in entries[1]["error"]
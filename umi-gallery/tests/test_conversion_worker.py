@@ -0,0 +1,32 @@
+import pytest
+
+from conversion_worker import SCRIPTS, run_request
+
+
+@pytest.mark.parametrize("script", SCRIPTS)
+def test_every_script_takes_argv(script):
+    # --help exits 0 only if argv reaches the script's own parser
+    response = run_request({"id": 1, "script": script, "argv": ["--help"]})
+    assert response == {"id": 1, "ok": True, "elapsed": response["elapsed"]}
+
+
+def test_optimize_request(tmp_path):
+    rr = pytest.importorskip("rerun")
+
+    rrd_path = tmp_path / "scalars.rrd"
+    rec = rr.RecordingStream("test_conversion_worker")
+    rec.save(str(rrd_path))
+    for i in range(100):
+        rec.set_time("frame", sequence=i)
+        rec.log("value", rr.Scalars(float(i)))
+    rec.disconnect()
+
+    response = run_request({"id": 2, "script": "optimize_rrd", "argv": [str(rrd_path)]})
+    assert response["ok"], response
+    assert rrd_path.stat().st_size > 0
+
+
+def test_unknown_script_is_refused():
+    response = run_request({"id": 3, "script": "os", "argv": []})
+    assert not response["ok"]
+    assert "Unknown script" in response["error"]
@@ -0,0 +1,52 @@
+import pytest
+
+from h264_stream import nal_units, H264Streams, NAL_IDR, NAL_SPS, NAL_PPS
+
+SPS = b"\x00\x00\x00\x01\x67\x42\x00\x1e"
+PPS = b"\x00\x00\x00\x01\x68\xce\x38\x80"
+IDR = b"\x00\x00\x01\x65\x88\x84\x80"
+SLICE = b"\x00\x00\x01\x41\x9a\x02"
+
+
+def test_nal_units_four_byte_start_codes():
+    units = nal_units(SPS + PPS)
+    assert [t for t, _ in units] == [NAL_SPS, NAL_PPS]
+    assert [u for _, u in units] == [SPS, PPS]
+
+
+def test_nal_units_three_byte_start_codes():
+    units = nal_units(IDR + SLICE)
+    assert [t for t, _ in units] == [NAL_IDR, 1]
+    assert [u for _, u in units] == [IDR, SLICE]
+
+
+def test_nal_units_mixed_start_codes_keep_every_byte():
+    data = SPS + IDR + PPS + SLICE
+    units = nal_units(data)
+    assert [t for t, _ in units] == [NAL_SPS, NAL_IDR, NAL_PPS, 1]
+    assert b"".join(u for _, u in units) == data
+
+
+def test_nal_units_without_start_code():
+    assert nal_units(b"\x65\x88\x84") == []
+    assert nal_units(b"") == []
+
+
+def test_keyframes_get_cached_parameter_sets():
+    pytest.importorskip("rerun")
+    import rerun as rr
+
+    rr.init("test_h264_stream", spawn=False)
+    video = H264Streams()
+    video.add("cam", 0, SPS + PPS)      # parameter sets on their own
+    video.add("cam", 1, IDR)
+    video.add("cam", 2, SLICE)
+    video.add("cam", 3, IDR)            # later keyframe without SPS/PPS
+    stream = video.streams["cam"]
+
+    # The first keyframe starts a GOP and is buffered; the second flushed it
+    assert stream["samples"] == [SPS + PPS + IDR]
+    assert stream["keyframes"] == [True]
+    assert stream["keyframe_count"] == 2
+    assert stream["repaired"] == 1
+    assert stream["sample_count"] == 3
@@ -0,0 +1,26 @@
+import os
+
+import pytest
+
+from memory_budget import FLUSH_BYTES_ENV, MemoryBudget, budget_recording
+
+
+def test_recording_restores_flush_setting(monkeypatch):
+    monkeypatch.delenv(FLUSH_BYTES_ENV, raising=False)
+    budget = MemoryBudget(64 * 1024 * 1024)
+    with budget_recording(budget):
+        assert os.environ[FLUSH_BYTES_ENV] == str(budget.flush_bytes)
+    assert FLUSH_BYTES_ENV not in os.environ
+
+    monkeypatch.setenv(FLUSH_BYTES_ENV, "12345")
+    with pytest.raises(RuntimeError):
+        with budget_recording(budget):
+            raise RuntimeError("conversion failed")
+    assert os.environ[FLUSH_BYTES_ENV] == "12345"
+
+
+def test_no_budget_leaves_flush_setting_alone(monkeypatch):
+    monkeypatch.setenv(FLUSH_BYTES_ENV, "12345")
+    with budget_recording(None):
+        assert os.environ[FLUSH_BYTES_ENV] == "12345"
+    assert os.environ[FLUSH_BYTES_ENV] == "12345"
@@ -0,0 +1,47 @@
+from rrd_writer import Event, reorder, merge_streams, shift_events
+
+
+def events(times, entity_path="e"):
+    return [Event(t, None, entity_path, i) for i, t in enumerate(times)]
+
+
+def test_reorder_sorts_within_lookahead():
+    result = list(reorder(iter(events([0.0, 0.2, 0.1, 0.4, 0.3, 0.5])), lookahead=2))
+    assert [e.time for e in result] == [0.0, 0.1, 0.2, 0.3, 0.4, 0.5]
+
+
+def test_reorder_keeps_input_order_for_ties():
+    result = list(reorder(iter(events([1.0, 0.5, 1.0, 1.0])), lookahead=4))
+    assert [e.archetype for e in result] == [1, 0, 2, 3]
+
+
+def test_reorder_emits_far_displaced_events_as_they_come():
+    result = list(reorder(iter(events([1.0, 2.0, 3.0, 0.0])), lookahead=1))
+    assert [e.time for e in result] == [1.0, 2.0, 0.0, 3.0]
+
+
+def test_merge_streams_orders_across_streams():
+    a = events([0.0, 0.3, 0.6, 0.9], "a")
+    b = events([0.1, 0.2, 0.7], "b")
+    c = events([0.05, 0.5], "c")
+    merged = list(merge_streams([iter(a), iter(b), iter(c)]))
+    assert [e.time for e in merged] == sorted(e.time for e in a + b + c)
+    assert len(merged) == len(a) + len(b) + len(c)
+
+
+def test_merge_streams_pulls_lazily():
+    pulled = []
+
+    def stream(name, times):
+        for event in events(times, name):
+            pulled.append(name)
+            yield event
+
+    merged = merge_streams([stream("a", [0.0, 1.0, 2.0]), stream("b", [0.5, 1.5])], lookahead=1)
+    next(merged)
+    assert len(pulled) < 5
+
+
+def test_shift_events_moves_both_timelines():
+    shifted = list(shift_events(iter([Event(1.0, 3, "e", None), Event(2.0, None, "e", None)]), 10.0, 100))
+    assert [(e.time, e.frame) for e in shifted] == [(11.0, 103), (12.0, None)]
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Verify converted RRD files against their sources without opening a viewer.
+
+Only summaries are compared, and no media is decoded on either side:
+- source: the MCAP summary (message counts per channel and time range),
+  meta/episodes.jsonl lengths, parquet footers, video frame counts from the
+  container header, and line counts of the Lumos text files
+- output: rows and time range per entity, read from the RRD chunks
+
+Every stream whose row count falls short of its source, or whose
+recording ends early, is reported. This catches truncated outputs, e.g.
+channels whose messages all failed to convert. Outputs clipped with
+--start/--end are reported as short too.
+
+Usage:
+    python verify_rrd.py
+    python verify_rrd.py --rrd-dir public/rrd --catalog public/catalog.json
+    python verify_rrd.py --lerobot source-data/tacexo_fold_towels --lumos-dir "../WBCD DataDemo"
+"""
+import os
+import sys
+import json
+import argparse
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+from build_catalog import build_catalog, find_lerobot_datasets
+
+# Columns that index rows rather than hold component data
+INDEX_COLUMNS = ("rerun.controls.RowId", "log_time", "log_tick", "timestamp", "frame")
+# Seconds a recording may end before its source without being flagged
+DEFAULT_TIME_SLACK = 1.0
+
+
+def rrd_summary(rrd_path: Path) -> dict:
+    """Per-entity temporal row counts and time ranges of an RRD.
+
+    Static rows are ignored. Compaction may put the components of one entity
+    in separate chunks, so an entity's rows are those of its fullest component.
+    """
+    import numpy as np
+    from rerun.chunk import RrdReader
+
+    components = {}
+    entities = {}
+    for chunk in RrdReader(str(rrd_path)).stream().to_chunks():
+        batch = chunk.to_record_batch()
+        if "timestamp" not in batch.schema.names and "frame" not in batch.schema.names:
+            continue
+        path = chunk.entity_path.lstrip("/")
+        entity = entities.setdefault(path, {"rows": 0, "start": None, "end": None, "last_frame": None,
+                                            "keyframes": 0, "video": False})
+        for name in batch.schema.names:
+            if name in INDEX_COLUMNS:
+                continue
+            column = batch.column(name)
+            key = (path, name)
+            components[key] = components.get(key, 0) + len(column) - column.null_count
+            if name == "VideoStream:sample":
+                entity["video"] = True
+            if name.endswith("is_keyframe"):
+                entity["keyframes"] += sum(1 for value in column.to_pylist() if value and value[0])
+        if "timestamp" in batch.schema.names:
+            times = batch.column("timestamp").cast("int64").to_numpy(zero_copy_only=False)
+            if len(times):
+                start, end = float(np.min(times)) / 1e9, float(np.max(times)) / 1e9
+                entity["start"] = start if entity["start"] is None else min(entity["start"], start)
+                entity["end"] = end if entity["end"] is None else max(entity["end"], end)
+        if "frame" in batch.schema.names and len(batch):
+            last_frame = int(np.max(batch.column("frame").to_numpy(zero_copy_only=False)))
+            entity["last_frame"] = max(entity["last_frame"] or 0, last_frame)
+
+    for (path, _), rows in components.items():
+        entities[path]["rows"] = max(entities[path]["rows"], rows)
+    return entities
+
+
+def count_lines(path: Path) -> int:
+    """Non-empty lines of a text file, counted in binary blocks without parsing."""
+    lines = 0
+    last_byte = b"\n"
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(1 << 20)
+            if not block:
+                break
+            lines += block.count(b"\n")
+            last_byte = block[-1:]
+    return lines + (last_byte != b"\n")
+
+
+def video_frame_count(video_path: Path):
+    """Frame count from the container header, or None if unknown."""
+    import cv2
+
+    cap = cv2.VideoCapture(str(video_path))
+    try:
+        count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) if cap.isOpened() else 0
+    finally:
+        cap.release()
+    return count or None
+
+
+def expected_mcap(entry: dict) -> dict:
+    """Expected entity rows and time range for an MCAP conversion, from its summary."""
+    from mcap.reader import make_reader
+    from convert_mcap_to_rrd import SKIP_CHANNELS, IMU_FIELDS
+
+    with open(entry["path"], "rb") as f:
+        summary = make_reader(f).get_summary()
+    if summary is None or summary.statistics is None:
+        raise ValueError("source MCAP has no summary statistics")
+
+    streams = {}
+    for channel_id, channel in summary.channels.items():
+        count = summary.statistics.channel_message_counts.get(channel_id, 0)
+        schema = summary.schemas.get(channel.schema_id)
+        schema_name = schema.name if schema else ""
+        if channel.topic in SKIP_CHANNELS or not count:
+            continue
+        entity_path = channel.topic.lstrip("/")
+        if "IMUMeasurement" in schema_name:
+            for field in IMU_FIELDS:
+                streams[f"{entity_path}/{field}"] = count
+                streams[f"{entity_path}/{field}_magnitude"] = count
+        elif any(kind in schema_name for kind in ("CompressedImage", "PoseInFrame", "CameraCalibration",
+                                                     "MagneticEncoderMeasurement")):
+            streams[entity_path] = streams.get(entity_path, 0) + count
+    stats = summary.statistics
+    return {"streams": streams, "end": stats.message_end_time / 1e9}
+
+
+def expected_lerobot(entry: dict) -> dict:
+    """Expected entity rows for a LeRobot episode, from parquet footers and video headers."""
+    from lerobot_streams import load_dataset_info, list_streams, video_file, entity_path_for
+    from convert_lerobot_to_rrd import ENTITY_NAMES as LEROBOT_NAMES
+    from convert_tacexo_to_rrd import ENTITY_NAMES as TACEXO_NAMES
+
+    dataset_path = Path(entry["path"])
+    info = load_dataset_info(dataset_path)
+    # Same converter choice as watch_sources
+    entity_names = TACEXO_NAMES if "tacexo" in dataset_path.name else LEROBOT_NAMES
+    streams = {}
+    scalar_rows = entry.get("rows") or entry["frames"]
+    for stream in list_streams(info):
+        entity_path = entity_path_for(stream["key"], entity_names)
+        if stream["kind"] == "video":
+            frames = video_frame_count(video_file(dataset_path, info, stream["key"], entry["episode"]))
+            if frames:
+                streams[entity_path] = frames
+        else:
+            # One entity per joint below the stream's path
+            streams[entity_path + "/*"] = scalar_rows
+    return {"streams": streams, "last_frame": entry["frames"] - 1, "optional": True}
+
+
+def resampled_rows(clamp_file: Path, timestamps_file: Path) -> int:
+    """Gripper rows of `--clamp-clock video`: camera stamps from the first clamp reading on."""
+    import pandas as pd
+
+    first = pd.read_csv(clamp_file, sep=" ", header=None, usecols=[0]).iloc[:, 0].min()
+    stamps = pd.read_csv(timestamps_file)["header_stamp"]
+    return int((stamps >= first).sum())
+
+
+def expected_lumos(entry: dict, clamp_clock: str = "clamp") -> dict:
+    """Expected entity rows and time range for a Lumos session, from line counts."""
+    session_path = Path(entry["path"])
+    streams = {}
+    for hand_dir in sorted(session_path.glob("*_hand_*")):
+        hand_name = "left_hand" if "left_hand" in hand_dir.name else "right_hand"
+        if "right_hand" not in hand_dir.name and "left_hand" not in hand_dir.name:
+            hand_name = hand_dir.name
+        traj_file = hand_dir / "Merged_Trajectory" / "merged_trajectory.txt"
+        clamp_file = hand_dir / "Clamp_Data" / "clamp_data_tum.txt"
+        timestamps_file = hand_dir / "RGB_Images" / "timestamps.csv"
+        if traj_file.exists():
+            streams[f"world/{hand_name}/eef"] = count_lines(traj_file)
+        if clamp_file.exists():
+            # Same choice of clock as convert_lumos_to_rrd --clamp-clock
+            if clamp_clock == "video" and timestamps_file.exists():
+                streams[f"world/{hand_name}/gripper/width"] = resampled_rows(clamp_file, timestamps_file)
+            else:
+                streams[f"world/{hand_name}/gripper/width"] = count_lines(clamp_file)
+        video_path = hand_dir / "RGB_Images" / "video.mp4"
+        if timestamps_file.exists() and video_path.exists():
+            # The converter stops at whichever of video and stamps runs out first
+            stamps = count_lines(timestamps_file) - 1
+            frames = video_frame_count(video_path)
+            streams[f"world/{hand_name}/camera"] = min(stamps, frames) if frames else stamps
+    return {"streams": streams, "end": entry.get("end")}
+
+
+EXPECTED = {"mcap": expected_mcap, "lerobot": expected_lerobot, "lumos": expected_lumos}
+
+
+def verify_output(rrd_path: str, entry: dict, time_slack: float = DEFAULT_TIME_SLACK,
+                  clamp_clock: str = "clamp") -> dict:
+    """Compare one RRD with the source summary of its catalog entry."""
+    if entry["kind"] == "lumos":
+        expected = expected_lumos(entry, clamp_clock)
+    else:
+        expected = EXPECTED[entry["kind"]](entry)
+    entities = rrd_summary(Path(rrd_path))
+    problems = []
+    checked = 0
+
+    for pattern, count in sorted(expected["streams"].items()):
+        if pattern.endswith("/*"):
+            matches = [(path, e) for path, e in entities.items() if path.startswith(pattern[:-1])]
+        else:
+            matches = [(pattern, entities[pattern])] if pattern in entities else []
+        if not matches:
+            # LeRobot streams can be left out with --include/--exclude
+            if not expected.get("optional"):
+                problems.append(f"{pattern}: missing (source has {count})")
+            continue
+        for path, entity in matches:
+            checked += 1
+            # H.264 parameter-set messages are merged into the next keyframe sample,
+            # so a video stream may be one row short per keyframe; other streams may not
+            slack = entity["keyframes"] if entity["video"] else 0
+            if entity["rows"] + slack < count:
+                problems.append(f"{path}: {entity['rows']} of {count} rows")
+
+    ends = [e["end"] for e in entities.values() if e["end"] is not None]
+    if expected.get("end") is not None and ends and max(ends) < expected["end"] - time_slack:
+        problems.append(f"ends {expected['end'] - max(ends):.2f}s before the source")
+    last_frames = [e["last_frame"] for e in entities.values() if e["last_frame"] is not None]
+    if expected.get("last_frame") is not None and last_frames and max(last_frames) < expected["last_frame"]:
+        problems.append(f"last frame {max(last_frames)}, source has {expected['last_frame'] + 1} frames")
+    if not checked and not problems:
+        problems.append("no streams to compare")
+
+    return {"id": entry["id"], "ok": not problems, "streams": checked, "problems": problems}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check converted RRD files against source summaries")
+    parser.add_argument("--rrd-dir", type=Path, default=Path("public/rrd"), help="Directory of converted RRDs")
+    parser.add_argument("--catalog", type=Path, default=None,
+                        help="Source catalog from build_catalog.py (default: scan the sources below)")
+    parser.add_argument("--mcap-dir", type=Path, default=Path("public/mcap"), help="Directory of MCAP files")
+    parser.add_argument("--lerobot", type=Path, nargs="*", default=None,
+                        help="LeRobot dataset directories (default: all under source-data)")
+    parser.add_argument("--lumos-dir", type=Path, default=None, help="Lumos root with <task>/<session> folders")
+    parser.add_argument("--clamp-clock", choices=["clamp", "video"], default="clamp",
+                        help="--clamp-clock the Lumos sessions were converted with (default: clamp)")
+    parser.add_argument("--time-slack", type=float, default=DEFAULT_TIME_SLACK,
+                        help=f"Seconds an output may end early (default: {DEFAULT_TIME_SLACK})")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4,
+                        help="Files verified in parallel (default: all CPUs)")
+    args = parser.parse_args()
+
+    if args.catalog is not None:
+        with open(args.catalog, "r") as f:
+            catalog = json.load(f)
+    else:
+        lerobot_paths = args.lerobot if args.lerobot is not None else find_lerobot_datasets(Path("source-data"))
+        catalog = build_catalog(args.mcap_dir, lerobot_paths, args.lumos_dir)
+
+    rrd_files = sorted(args.rrd_dir.glob("*.rrd"))
+    jobs = [(path, catalog["datasets"][path.stem]) for path in rrd_files if path.stem in catalog["datasets"]]
+    unmatched = [path.name for path in rrd_files if path.stem not in catalog["datasets"]]
+    print(f"Verifying {len(jobs)} RRD files in {args.rrd_dir}")
+
+    failed = []
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = [(entry["id"], pool.submit(verify_output, str(path), entry, args.time_slack,
+                                               args.clamp_clock))
+                   for path, entry in jobs]
+        for entry_id, future in futures:
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {"id": entry_id, "ok": False, "streams": 0, "problems": [f"error: {e}"]}
+            if result["ok"]:
+                print(f"  OK    {entry_id} ({result['streams']} streams)")
+            else:
+                print(f"  FAIL  {entry_id}: " + "; ".join(result["problems"]))
+                failed.append(entry_id)
+
+    if unmatched:
+        print(f"No source for: {', '.join(unmatched)}")
+    print(f"\n{len(jobs) - len(failed)}/{len(jobs)} outputs match their sources")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
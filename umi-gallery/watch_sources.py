@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Watch the gallery sources and rebuild datasets whose inputs changed.
+
+Polls the datasets in gallery_build.json (plus any MCAP files, LeRobot
+datasets and Lumos sessions dropped under --discover directories) and, once a
+dataset's files have stopped changing for --debounce seconds, reconverts and
+re-thumbnails just that dataset in a process pool. Smaller datasets are
+started first so a large drop does not hold up quick ones.
+
+Outputs are built in a staging directory and renamed into public/ when
+complete, so the vite dev server never serves a half-written RRD.
+
+Usage:
+    python watch_sources.py
+    python watch_sources.py --discover source-data --jobs 4 --debounce 5
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from build_gallery import build_dataset, run_job, plan_dataset
+from build_catalog import find_lerobot_datasets
+
+
+def expand_datasets(config: dict, discover_dirs: list) -> dict:
+    """Map dataset name -> config entry, one entry per independently built dataset."""
+    datasets = {}
+
+    def add(name, dataset):
+        if name not in datasets:
+            datasets[name] = dataset
+
+    configured = {Path(dataset["source"]).resolve() for dataset in config["datasets"]}
+    for dataset in config["datasets"]:
+        source = Path(dataset["source"])
+        if dataset["kind"] == "mcap" and source.is_dir():
+            # Each MCAP file is its own dataset, so a new drop only builds that file
+            for mcap_file in sorted(source.glob("*.mcap")):
+                add(mcap_file.stem, {"kind": "mcap", "source": str(mcap_file)})
+        elif source.exists():
+            add(dataset.get("name", source.name), dataset)
+
+    for root in discover_dirs:
+        for mcap_file in sorted(root.glob("**/*.mcap")):
+            add(mcap_file.stem, {"kind": "mcap", "source": str(mcap_file)})
+        for dataset_path in find_lerobot_datasets(root):
+            if dataset_path.resolve() in configured:
+                # gallery_build.json already picks its episodes
+                continue
+            kind = "tacexo" if "tacexo" in dataset_path.name else "lerobot"
+            # Every episode in meta/episodes.jsonl, listed when the build is planned
+            add(dataset_path.name, {"kind": kind, "source": str(dataset_path), "episodes": "all"})
+        for session in sorted(p for p in root.glob("**/session_*") if p.is_dir()):
+            if not any(session.glob("*_hand_*")):
+                continue
+            # Same ids as build_catalog.find_lumos_sessions
+            siblings = [p for p in session.parent.glob("session_*") if p.is_dir()]
+            name = (f"lumos_{session.parent.name}" if len(siblings) == 1
+                    else f"lumos_{session.parent.name}_{session.name}")
+            add(name, {"kind": "lumos", "source": str(session), "name": name})
+
+    return datasets
+
+
+def fingerprint(source: Path) -> tuple:
+    """(size, mtime) of every file under a source; changes when any input changes."""
+    try:
+        if source.is_file():
+            stat = source.stat()
+            return ((source.name, stat.st_size, stat.st_mtime_ns),)
+        entries = []
+        for path in sorted(source.rglob("*")):
+            if path.is_file():
+                stat = path.stat()
+                entries.append((str(path.relative_to(source)), stat.st_size, stat.st_mtime_ns))
+        return tuple(entries)
+    except FileNotFoundError:
+        # Files moved while scanning; the next poll sees the settled state
+        return None
+
+
+def input_bytes(signature: tuple) -> int:
+    return sum(size for _, size, _ in signature or ())
+
+
+def outputs_up_to_date(dataset: dict, signature: tuple, rrd_dir: Path) -> bool:
+    """True if every RRD the dataset produces is newer than all of its inputs."""
+    outputs = [Path(job["kwargs"]["output"]) for job in plan_dataset(dataset, rrd_dir, rrd_dir)
+               if job["kind"] == "optimize"]
+    if not outputs or not all(path.exists() for path in outputs):
+        return False
+    newest_input = max((mtime for _, _, mtime in signature), default=0)
+    return min(path.stat().st_mtime_ns for path in outputs) >= newest_input
+
+
+def watch(config: dict, discover_dirs: list, max_jobs: int, interval: float, debounce: float):
+    rrd_dir = Path(config.get("rrd_dir", "public/rrd"))
+    thumbnail_dir = Path(config.get("thumbnail_dir", "public/thumbnails"))
+    rrd_dir.mkdir(parents=True, exist_ok=True)
+    thumbnail_dir.mkdir(parents=True, exist_ok=True)
+
+    # name -> {"seen": signature, "since": time it was first seen, "built": signature}
+    state = {}
+    running = {}
+
+    print(f"Watching {len(expand_datasets(config, discover_dirs))} datasets "
+          f"(poll {interval}s, debounce {debounce}s, {max_jobs} parallel). Ctrl-C to stop.")
+
+    with ProcessPoolExecutor(max_workers=max_jobs) as pool:
+        try:
+            while True:
+                now = time.monotonic()
+                datasets = expand_datasets(config, discover_dirs)
+
+                ready = []
+                for name, dataset in datasets.items():
+                    signature = fingerprint(Path(dataset["source"]))
+                    if signature is None:
+                        continue
+                    entry = state.get(name)
+                    if entry is None:
+                        # Existing outputs that are newer than the inputs need no rebuild
+                        built = signature if outputs_up_to_date(dataset, signature, rrd_dir) else None
+                        entry = state[name] = {"seen": signature, "since": now, "built": built}
+                        if built is None:
+                            print(f"[watch] {name}: out of date")
+                    elif signature != entry["seen"]:
+                        entry["seen"], entry["since"] = signature, now
+                        print(f"[watch] {name}: changed, waiting for writes to settle")
+                        continue
+
+                    settled = now - entry["since"] >= debounce
+                    building = any(job_name == name for job_name, _ in running.values())
+                    if settled and not building and entry["seen"] != entry["built"]:
+                        ready.append((input_bytes(entry["seen"]), name, dataset))
+
+                # Smallest first; the pool only ever holds as many builds as workers
+                for _, name, dataset in sorted(ready, key=lambda item: item[:2]):
+                    if len(running) >= max_jobs:
+                        break
+                    signature = state[name]["seen"]
+                    future = pool.submit(run_job, f"build:{name}", build_dataset,
+                                         {"dataset": dataset, "rrd_dir": str(rrd_dir),
+                                          "thumbnail_dir": str(thumbnail_dir), "name": name})
+                    running[future] = (name, signature)
+                    print(f"[watch] {name}: building")
+
+                finished, _ = wait(running, timeout=interval, return_when=FIRST_COMPLETED) \
+                    if running else (set(), None)
+                for future in finished:
+                    name, signature = running.pop(future)
+                    # A failed build is not retried until its inputs change again
+                    state[name]["built"] = signature
+                    try:
+                        elapsed = future.result()
+                        print(f"[watch] {name}: done in {elapsed:.1f}s")
+                    except Exception as e:
+                        print(f"[watch] {name}: FAILED: {e}")
+                if not running:
+                    time.sleep(interval)
+        except KeyboardInterrupt:
+            print("\nStopping; waiting for running builds to finish...")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild gallery datasets when their sources change")
+    parser.add_argument("--config", type=Path, default=Path("gallery_build.json"), help="Build config (JSON)")
+    parser.add_argument("--discover", type=Path, action="append", default=[],
+                        help="Also watch this directory for new MCAP/LeRobot/Lumos datasets (repeatable)")
+    parser.add_argument("--jobs", type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                        help="Max datasets built in parallel (default: half the CPUs)")
+    parser.add_argument("--interval", type=float, default=2.0, help="Seconds between polls (default: 2)")
+    parser.add_argument("--debounce", type=float, default=3.0,
+                        help="Seconds a dataset must be unchanged before it is rebuilt (default: 3)")
+    args = parser.parse_args()
+
+    with open(args.config, "r") as f:
+        config = json.load(f)
+
+    watch(config, args.discover, args.jobs, args.interval, args.debounce)
+
+
+if __name__ == "__main__":
+    main()